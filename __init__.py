@@ -1,2 +1,3 @@
 # -*- coding: utf-8 -*-
-from . import models
\ No newline at end of file
+from . import models
+from . import controllers
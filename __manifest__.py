@@ -50,11 +50,12 @@ Développé par CESI LINEACT - Projet OPTIMAN
     'license': 'LGPL-3',
     'depends': ['base', 'web', 'mrp'],
     'external_dependencies': {
-        'python': ['plotly', 'pandas', 'numpy', 'openpyxl'],
+        'python': ['plotly', 'pandas', 'numpy', 'xlsxwriter'],
     },
     'data': [
         'security/ir.model.access.csv',
         'data/sequence_data.xml',
+        'data/ir_cron_data.xml',
         'data/demo_data.xml',
         'views/menu_views.xml',
         'views/planificateur_views.xml',
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+import functools
+import gzip
+
+from odoo import http
+from odoo.http import request
+
+try:
+    from plotly.offline import get_plotlyjs
+except ImportError:
+    get_plotlyjs = None
+
+# URL de plotly.js référencée par les HTML Gantt / convergence
+PLOTLYJS_URL = '/planificateur_cnc/plotly.min.js'
+
+
+@functools.lru_cache(maxsize=1)
+def _plotlyjs_bytes():
+    """plotly.js fourni par le paquet Python installé (même version que les figures)"""
+    return get_plotlyjs().encode('utf-8')
+
+
+class PlanificateurAssets(http.Controller):
+
+    @http.route(PLOTLYJS_URL, type='http', auth='public')
+    def plotlyjs(self):
+        """Servir plotly.js une fois, mis en cache par le navigateur"""
+        if get_plotlyjs is None:
+            return request.not_found()
+        return request.make_response(_plotlyjs_bytes(), headers=[
+            ('Content-Type', 'application/javascript; charset=utf-8'),
+            ('Cache-Control', 'public, max-age=604800'),
+        ])
+
+    @http.route('/planificateur_cnc/chart/<int:attachment_id>', type='http', auth='user')
+    def chart(self, attachment_id):
+        """Servir un graphique HTML du planificateur, tel quel s'il est compressé"""
+        attachment = request.env['ir.attachment'].browse(attachment_id).exists()
+        if not attachment or attachment.res_model != 'planificateur.cnc':
+            return request.not_found()
+        data = attachment.raw
+        headers = [
+            ('Content-Type', 'text/html; charset=utf-8'),
+            ('Vary', 'Accept-Encoding'),
+        ]
+        if attachment.name.endswith('.gz'):
+            if 'gzip' in request.httprequest.headers.get('Accept-Encoding', ''):
+                headers.append(('Content-Encoding', 'gzip'))
+            else:
+                data = gzip.decompress(data)
+        return request.make_response(data, headers=headers)
@@ -243,7 +243,7 @@ class GanttChartGenerator:
         """
         fig = self.generate_advanced_gantt()
         fig.write_html(filename)
-        _logger.info(f"Diagramme de Gantt sauvegardé: {filename}")
+        _logger.info("Diagramme de Gantt sauvegardé: %s", filename)
         return filename
     
     def save_as_png(self, filename: str = "gantt_chart.png", width: int = 1400, height: int = 800):
@@ -259,10 +259,10 @@ class GanttChartGenerator:
         fig = self.generate_advanced_gantt()
         try:
             fig.write_image(filename, width=width, height=height)
-            _logger.info(f"Diagramme de Gantt sauvegardé: {filename}")
+            _logger.info("Diagramme de Gantt sauvegardé: %s", filename)
             return filename
         except Exception as e:
-            _logger.error(f"Erreur lors de la sauvegarde PNG: {e}")
+            _logger.error("Erreur lors de la sauvegarde PNG: %s", e)
             _logger.info("Installez kaleido: pip install kaleido")
             return None
     
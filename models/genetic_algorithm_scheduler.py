@@ -8,10 +8,17 @@ Date: Novembre 2025
 
 import random
 import numpy as np
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, date
 from typing import List, Tuple, Dict
 import logging
 
+try:
+    import numba
+except ImportError:
+    numba = None
+
 _logger = logging.getLogger(__name__)
 
 
@@ -34,18 +41,26 @@ class Individual:
         self.valid = True
 
     def copy(self):
-        return Individual(
+        clone = Individual(
             self.sequence.copy(),
             self.machine_assignments.copy(),
             [bloc.copy() for bloc in self.block_structure]
         )
+        # Conserver l'évaluation (sinon le meilleur individu perd sa fitness)
+        clone.fitness = self.fitness
+        clone.makespan = self.makespan
+        clone.total_delay = self.total_delay
+        clone.machine_balance = self.machine_balance
+        return clone
 
 
 class GeneticAlgorithmScheduler:
     def __init__(self, ofs, machines, setup_time=30, tool_capacity=40,
                  population_size=50, generations=100,
                  crossover_rate=0.8, mutation_rate=0.2,
-                 objective='makespan'):
+                 objective='makespan', start_date=None, n_workers=1,
+                 cache_size=None, patience=0, tol=0.0, progress_callback=None,
+                 seed=None):
 
         self.ofs = ofs
         self.machines = machines
@@ -56,13 +71,140 @@ class GeneticAlgorithmScheduler:
         self.crossover_rate = crossover_rate
         self.mutation_rate = mutation_rate
         self.objective = objective
+        # Arrêt anticipé : pas d'amélioration relative > tol sur `patience`
+        # générations (0 = toujours aller jusqu'à `generations`)
+        self.patience = patience or 0
+        self.tol = tol or 0.0
+        # Graine aléatoire : même graine + mêmes données = même solution.
+        # Générateur propre à l'instance : l'état du module random du
+        # processus (partagé avec le reste d'Odoo) n'est jamais modifié
+        self.seed = seed or None
+        self._random = random.Random(self.seed)
+        # Appelé après chaque génération : progress_callback(génération, meilleure fitness)
+        self.progress_callback = progress_callback
+        # Processus d'évaluation de la fitness (1 = évaluation séquentielle)
+        self.n_workers = max(1, n_workers or 1)
+        self._n_machines = len(machines)
+        # Cache LRU des évaluations (chromosome -> fitness, makespan, retard) ;
+        # 0 désactive le cache, None = 4 x la population
+        self.cache_size = 4 * population_size if cache_size is None else cache_size
+        self._fit_cache = OrderedDict()
+        # Origine des temps de la simulation (minute 0)
+        self.start_date = start_date or datetime.now()
+
+        # Position de bit de chaque outil (masques d'outils des opérations)
+        self._tool_bit = {}
+        self._op_tool_mask = {}
 
         # Extraction des données et création des tâches unitaires
         self.of_data = self._extract_of_data()
         self.tasks = self._create_task_list()  # Liste de (of_id, op_code)
+        # Index dense des pièces : piece_key = offset[of_id] + piece_idx
+        self._piece_offset, self._n_pieces = _piece_offsets(self.of_data)
+        # Dernière opération de chaque OF et échéance de chaque pièce (minutes)
+        self._last_op = {of_id: 'OP2' if 'OP2' in data['ops'] else 'OP1'
+                         for of_id, data in self.of_data.items()}
+        self._piece_due_min = self._compute_piece_due_dates()
+        # Données des tâches en tableaux parallèles (noyau compilé numba)
+        self._task_index, self._task_arrays = self._build_task_arrays()
+        self._simulate = self._select_simulation()
 
         self.best_fitness_history = []
         self.avg_fitness_history = []
+        # Fitness de la population courante (mise à jour par _replacement)
+        self._fit_buf = np.empty(0)
+        self._executor = None
+        self._rng = np.random.default_rng()
+
+    def __getstate__(self):
+        # Copie envoyée aux processus d'évaluation : sans recordsets Odoo
+        # (non sérialisables) ni pool, seulement les données de simulation
+        state = self.__dict__.copy()
+        for key in ('ofs', 'machines', '_executor', '_simulate', '_fit_cache',
+                    'progress_callback'):
+            state.pop(key, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.ofs = self.machines = self._executor = self.progress_callback = None
+        self._fit_cache = OrderedDict()
+        self._simulate = self._select_simulation()
+
+    def _select_simulation(self):
+        """Noyau compilé si numba est installé, sinon variante Python adaptée"""
+        if _simulate_jit is not None:
+            return self._simulate_compiled
+        # Noyau spécialisé si aucune OP2 (pas de précédence)
+        has_op2 = any('OP2' in data['ops'] for data in self.of_data.values())
+        return self._simulate_general if has_op2 else self._simulate_op1_only
+
+    def _build_task_arrays(self):
+        """
+        Index dense des tâches et tableaux numpy par tâche : durée pièce,
+        chargement, rotation, index pièce, OP2 ?, dernière opération ?
+        """
+        n = len(self.tasks)
+        task_index = {task: i for i, task in enumerate(self.tasks)}
+        # Types compacts là où la valeur reste exacte : minutes entières de
+        # chargement/rotation en float32, index en int32 ; les durées pièce
+        # (fractionnaires) et les cumuls de la simulation restent en float64
+        duration = np.zeros(n)
+        chargement = np.zeros(n, dtype=np.float32)
+        rotation = np.zeros(n, dtype=np.float32)
+        piece_key = np.zeros(n, dtype=np.int32)
+        is_op2 = np.zeros(n, dtype=np.bool_)
+        is_last = np.zeros(n, dtype=np.bool_)
+        # Masques d'outils : entiers Python (plus de 64 outils possibles)
+        self._task_tool_mask = [0] * n
+        for i, (of_id, piece_idx, op_code) in enumerate(self.tasks):
+            data = self.of_data[of_id]
+            self._task_tool_mask[i] = data['ops'][op_code]['tool_mask']
+            duration[i] = data['ops'][op_code]['duration'] / data['quantite']
+            chargement[i] = data['duree_chargement']
+            rotation[i] = data['duree_rotation']
+            piece_key[i] = self._piece_offset[of_id] + piece_idx
+            is_op2[i] = op_code == 'OP2'
+            is_last[i] = op_code == self._last_op[of_id]
+        return task_index, (duration, chargement, rotation, piece_key, is_op2, is_last)
+
+    def block_totals(self, individual: Individual) -> Tuple[np.ndarray, List[int]]:
+        """
+        Durée (min) et nombre d'outils distincts de chaque bloc de la solution.
+        Les durées pièce sont lues dans les tableaux par tâche puis sommées
+        par bloc en un seul appel numpy (np.bincount pondéré, robuste aux
+        blocs vides).
+        """
+        blocks = individual.block_structure
+        task_index = self._task_index
+        task_idx = np.fromiter((task_index[task] for block in blocks for task in block),
+                               dtype=np.int32, count=sum(len(block) for block in blocks))
+        block_index = np.repeat(np.arange(len(blocks)), [len(block) for block in blocks])
+        times = np.bincount(block_index, weights=self._task_arrays[0][task_idx],
+                            minlength=len(blocks))
+
+        tool_counts = []
+        pos = 0
+        for block in blocks:
+            mask = 0
+            for t in task_idx[pos:pos + len(block)]:
+                mask |= self._task_tool_mask[t]
+            tool_counts.append(_popcount(mask))
+            pos += len(block)
+        return times, tool_counts
+
+    def _simulate_compiled(self, ind: Individual):
+        """Simulation via le noyau numba (mêmes règles que _simulate_general)"""
+        blocks = ind.block_structure
+        task_index = self._task_index
+        n_tasks = sum(len(block) for block in blocks)
+        task_idx = np.fromiter((task_index[task] for block in blocks for task in block),
+                               dtype=np.int32, count=n_tasks)
+        block_len = np.fromiter((len(block) for block in blocks),
+                                dtype=np.int32, count=len(blocks))
+        block_machine = np.asarray(ind.machine_assignments, dtype=np.int32)
+        return _simulate_jit(task_idx, block_len, block_machine, self._n_machines,
+                             float(self.setup_time), self._n_pieces, *self._task_arrays)
 
     def _extract_of_data(self) -> Dict:
         data = {}
@@ -85,6 +227,7 @@ class GeneticAlgorithmScheduler:
                     # Simplification: liste des qté
                     'tools': op1.outil_ids.mapped('quantite_requise'),
                     'tool_ids': op1.outil_ids.ids,
+                    'tool_mask': self._operation_tool_mask(op1),
                     'montage': type_piece.montage_id.id if type_piece.montage_id else False,
                     'palette': type_piece.palette_type
                 }
@@ -96,6 +239,7 @@ class GeneticAlgorithmScheduler:
                     'duration': op2.temps_standard * of.quantite,
                     'tools': op2.outil_ids.mapped('quantite_requise'),
                     'tool_ids': op2.outil_ids.ids,
+                    'tool_mask': self._operation_tool_mask(op2),
                     # Souvent même montage mais retourné, ou différent ? Supposons même pour l'instant ou géré par type pièce
                     'montage': type_piece.montage_id.id if type_piece.montage_id else False,
                     'palette': type_piece.palette_type
@@ -113,6 +257,22 @@ class GeneticAlgorithmScheduler:
             }
         return data
 
+    def _operation_tool_mask(self, op) -> int:
+        """Masque d'outils d'une opération, calculé une fois par opération"""
+        mask = self._op_tool_mask.get(op.id)
+        if mask is None:
+            tool_ids = [int(t) for t in op.outil_ids_sorted.split(',')] if op.outil_ids_sorted else []
+            mask = self._op_tool_mask[op.id] = self._tool_mask(tool_ids)
+        return mask
+
+    def _tool_mask(self, tool_ids) -> int:
+        """Encoder un ensemble d'outils en masque de bits (entier Python)"""
+        mask = 0
+        for tool_id in tool_ids:
+            bit = self._tool_bit.setdefault(tool_id, len(self._tool_bit))
+            mask |= 1 << bit
+        return mask
+
     def _create_task_list(self) -> List[Tuple[int, int, str]]:
         """
         Créer une liste de tâches au niveau PIÈCE (pas OF)
@@ -129,17 +289,49 @@ class GeneticAlgorithmScheduler:
                     tasks.append((of_id, piece_idx, 'OP2'))
         return tasks
 
+    def _compute_piece_due_dates(self) -> np.ndarray:
+        """
+        Convertir les dates de livraison en minutes depuis start_date,
+        une entrée par pièce (inf si l'OF n'a pas d'échéance).
+        """
+        due = np.full(self._n_pieces, np.inf)
+        for of_id, data in self.of_data.items():
+            due_date = data['date_livraison']
+            if not isinstance(due_date, (datetime, date)):
+                continue
+            if not isinstance(due_date, datetime):
+                due_date = datetime.combine(due_date, datetime.min.time())
+            offset = self._piece_offset[of_id]
+            due[offset:offset + data['quantite']] = \
+                (due_date - self.start_date).total_seconds() / 60
+        return due
+
     def run(self) -> Tuple[Individual, Dict]:
-        _logger.info(f"🧬 Démarrage AG Multi-Op: {len(self.tasks)} tâches")
+        _logger.info("🧬 Démarrage AG Multi-Op: %d tâches", len(self.tasks))
 
         if not self.tasks:
             _logger.warning(
                 "Aucune tâche à planifier (vérifiez les opérations des types de pièces).")
             return Individual([], [], []), {'makespan': 0, 'total_delay': 0, 'machine_balance': 0}
 
+        if self.n_workers > 1:
+            # Modèle maître-esclave : chaque processus reçoit une fois les
+            # données de simulation, puis seulement les chromosomes
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.n_workers,
+                initializer=_init_worker, initargs=(self,))
+        try:
+            return self._run()
+        finally:
+            if self._executor:
+                self._executor.shutdown()
+                self._executor = None
+
+    def _run(self) -> Tuple[Individual, Dict]:
+        # Générateur numpy dérivé de celui de l'instance : une seule graine
+        self._rng = np.random.default_rng(self._random.getrandbits(64))
         population = self._initialize_population()
-        for ind in population:
-            self._evaluate_fitness(ind)
+        self._evaluate_population(population)
 
         best_individual = min(population, key=lambda x: x.fitness)
 
@@ -154,17 +346,25 @@ class GeneticAlgorithmScheduler:
                     self._mutate(c2)
                     offspring.extend([c1, c2])
 
-            for ind in offspring:
-                self._evaluate_fitness(ind)
+            self._evaluate_population(offspring)
 
             population = self._replacement(population, offspring)
-            current_best = min(population, key=lambda x: x.fitness)
+            # self._fit_buf : fitness de la population, alignée sur population
+            current_best = population[int(self._fit_buf.argmin())]
             if current_best.fitness < best_individual.fitness:
                 best_individual = current_best.copy()
 
             self.best_fitness_history.append(best_individual.fitness)
-            self.avg_fitness_history.append(
-                np.mean([i.fitness for i in population]))
+            self.avg_fitness_history.append(float(self._fit_buf.mean()))
+            if self.progress_callback:
+                self.progress_callback(gen + 1, best_individual.fitness)
+
+            history = self.best_fitness_history
+            if self.patience and len(history) > self.patience and \
+                    history[-1] >= history[-1 - self.patience] * (1 - self.tol):
+                _logger.info("AG arrêté à la génération %d/%d (plateau sur %d générations)",
+                             gen + 1, self.generations, self.patience)
+                break
 
         stats = {
             'final_fitness': best_individual.fitness,
@@ -182,7 +382,7 @@ class GeneticAlgorithmScheduler:
             seq = self._generate_valid_sequence()
             blocks = self._create_blocks(seq)
             # Affectation machines aléatoire
-            mach = [random.randint(0, len(self.machines)-1)
+            mach = [self._random.randint(0, len(self.machines)-1)
                     for _ in range(len(blocks))]
             pop.append(Individual(seq, mach, blocks))
         return pop
@@ -192,7 +392,7 @@ class GeneticAlgorithmScheduler:
         # La contrainte de précédence sera gérée par le décodeur (fitness) ou réparation
         # Ici on fait un shuffle simple des tâches pièces
         seq = self.tasks.copy()
-        random.shuffle(seq)
+        self._random.shuffle(seq)
         return seq
 
     def _create_blocks(self, sequence: List[Tuple[int, int, str]]) -> List[List[Tuple[int, int, str]]]:
@@ -201,13 +401,13 @@ class GeneticAlgorithmScheduler:
             return blocks
 
         current_block = []
-        current_tools = set()
+        current_tools = 0  # Masque des outils du bloc courant
         current_montage = None
 
         for task in sequence:
             of_id, piece_idx, op_code = task
             op_info = self.of_data[of_id]['ops'][op_code]
-            task_tools = set(op_info['tool_ids'])
+            task_tools = op_info['tool_mask']
             task_montage = op_info['montage']
 
             # Règles de rupture de bloc :
@@ -218,8 +418,8 @@ class GeneticAlgorithmScheduler:
             if current_montage is not None and task_montage != current_montage:
                 is_compatible = False
 
-            new_tools_union = current_tools.union(task_tools)
-            if len(new_tools_union) > self.tool_capacity:
+            new_tools_union = current_tools | task_tools
+            if _popcount(new_tools_union) > self.tool_capacity:
                 is_compatible = False
 
             if is_compatible:
@@ -236,14 +436,19 @@ class GeneticAlgorithmScheduler:
             blocks.append(current_block)
         return blocks
 
-    def _evaluate_fitness(self, ind: Individual):
-        # Simulation de l'ordonnancement
-        machine_avail = {i: 0 for i in range(
-            len(self.machines))}  # Temps fin machine
-        # Temps fin OP1 pour chaque OF (pour contrainte précédence)
-        of_op1_end = {}
-
-        total_delay = 0
+    def _simulate_general(self, ind: Individual):
+        """
+        Simuler l'ordonnancement d'un individu (cas général OP1 + OP2).
+        Retourne (temps fin par machine, temps fin de chaque pièce).
+        """
+        # Temps fin machine (tableau dense indexé par position machine)
+        machine_avail = np.zeros(self._n_machines)
+        # Temps fin OP1 pour chaque pièce (pour contrainte précédence)
+        of_op1_end = np.zeros(self._n_pieces)
+        # Temps fin de la dernière opération de chaque pièce (pour le retard)
+        piece_end = np.zeros(self._n_pieces)
+        piece_offset = self._piece_offset
+        last_op = self._last_op
 
         for idx, block in enumerate(ind.block_structure):
             m_idx = ind.machine_assignments[idx]
@@ -262,9 +467,9 @@ class GeneticAlgorithmScheduler:
 
                 # Contrainte de précédence OP1 -> OP2 pour la MÊME PIÈCE
                 ready_time = start_time
+                piece_key = piece_offset[of_id] + piece_idx
                 if op_code == 'OP2':
-                    piece_key = (of_id, piece_idx)
-                    op1_end = of_op1_end.get(piece_key, 0)
+                    op1_end = of_op1_end[piece_key]
                     # Ajout temps rotation/transfert
                     ready_time = max(ready_time, op1_end +
                                      self.of_data[of_id]['duree_rotation'])
@@ -281,62 +486,144 @@ class GeneticAlgorithmScheduler:
                 start_time = end_task  # Pour la prochaine tâche du bloc
 
                 if op_code == 'OP1':
-                    piece_key = (of_id, piece_idx)
                     of_op1_end[piece_key] = end_task
 
-                # Calcul retard (sur la dernière opération de l'OF)
-                # Si c'est la dernière opération de l'OF (OP2 ou OP1 si phase unique)
-                is_last = False
-                if op_code == 'OP2':
-                    is_last = True
-                elif op_code == 'OP1' and 'OP2' not in self.of_data[of_id]['ops']:
-                    is_last = True
+                # Fin de la dernière opération de la pièce (OP2, ou OP1 si phase unique)
+                if op_code == last_op[of_id]:
+                    piece_end[piece_key] = end_task
+
+        return machine_avail, piece_end
+
+    def _simulate_op1_only(self, ind: Individual):
+        """
+        Variante spécialisée lorsqu'aucun OF n'a d'OP2 : pas de précédence
+        ni de rotation, et la machine est toujours libre à start_time.
+        """
+        machine_avail = np.zeros(self._n_machines)
+        piece_end = np.zeros(self._n_pieces)
+        piece_offset = self._piece_offset
+        of_data = self.of_data
+
+        for idx, block in enumerate(ind.block_structure):
+            m_idx = ind.machine_assignments[idx]
+            start_time = machine_avail[m_idx] + self.setup_time
+
+            for of_id, piece_idx, op_code in block:
+                data = of_data[of_id]
+                duration = data['ops'][op_code]['duration'] / data['quantite']
+                start_time += data['duree_chargement'] + duration
+                piece_end[piece_offset[of_id] + piece_idx] = start_time
+
+            machine_avail[m_idx] = start_time
+
+        return machine_avail, piece_end
+
+    def _evaluate_population(self, individuals: List[Individual]):
+        """
+        Évaluer une liste d'individus, en parallèle si un pool est actif.
+        Les chromosomes déjà évalués sont servis par le cache.
+        """
+        cache = self._fit_cache
+        pending = []
+        for ind in individuals:
+            key = self._chromosome_key(ind) if self.cache_size else None
+            result = cache.get(key) if key is not None else None
+            if result is None:
+                pending.append((ind, key))
+            else:
+                cache.move_to_end(key)
+                ind.fitness, ind.makespan, ind.total_delay = result
+
+        if self._executor and pending:
+            chunksize = max(1, len(pending) // (4 * self.n_workers))
+            genes = [(ind.block_structure, ind.machine_assignments) for ind, _ in pending]
+            results = self._executor.map(_evaluate_in_worker, genes, chunksize=chunksize)
+            for (ind, _), (fitness, makespan, total_delay) in zip(pending, results):
+                ind.fitness = fitness
+                ind.makespan = makespan
+                ind.total_delay = total_delay
+        else:
+            for ind, _ in pending:
+                self._evaluate_fitness(ind)
+
+        if self.cache_size:
+            for ind, key in pending:
+                cache[key] = (ind.fitness, ind.makespan, ind.total_delay)
+            while len(cache) > self.cache_size:
+                cache.popitem(last=False)
 
-                if is_last:
-                    due_date = self.of_data[of_id]['date_livraison']
-                    if due_date:
-                        # Conversion due_date (datetime) en minutes depuis le début (supposons start=0)
-                        # Simplification: on compare juste les durées relatives si pas de date absolue
-                        # TODO: Gérer dates absolues correctement
-                        pass
+    @staticmethod
+    def _chromosome_key(ind: Individual):
+        # Les blocs découpent la séquence dans l'ordre : séquence + longueurs
+        # des blocs + machines identifient entièrement l'ordonnancement
+        return (tuple(ind.sequence),
+                tuple(len(block) for block in ind.block_structure),
+                tuple(ind.machine_assignments))
 
-        makespan = max(machine_avail.values())
+    def _evaluate_fitness(self, ind: Individual):
+        # Simulation de l'ordonnancement (noyau choisi à l'initialisation)
+        machine_avail, piece_end = self._simulate(ind)
+
+        makespan = float(machine_avail.max())
+        # Retard par pièce vs date de livraison de son OF (inf => jamais en retard)
+        total_delay = float(np.maximum(
+            0.0, piece_end - self._piece_due_min).sum())
 
         # Pénalité si OP2 planifié avant OP1 (cas impossible avec la logique ci-dessus car on attend ready_time,
         # mais cela peut créer des trous énormes si l'ordre est mauvais dans le chromosome)
         # On ne pénalise pas explicitement car le makespan augmentera naturellement
 
         ind.makespan = makespan
-        ind.fitness = makespan  # + pénalités retards
+        ind.total_delay = total_delay
+        ind.fitness = total_delay if self.objective == 'delay' else makespan
 
     def _selection(self, pop):
-        # Tournoi
-        selected = []
-        for _ in range(len(pop)):
-            k = min(3, len(pop))
-            candidates = random.sample(pop, k)
-            selected.append(min(candidates, key=lambda x: x.fitness).copy())
-        return selected
+        # Tournoi vectorisé : k candidats tirés par ligne, argmin des fitness
+        n = len(pop)
+        k = min(3, n)
+        fitness = np.fromiter((ind.fitness for ind in pop), dtype=np.float64, count=n)
+        candidates = self._rng.integers(0, n, size=(n, k), dtype=np.int32)
+        winners = candidates[np.arange(n), fitness[candidates].argmin(axis=1)]
+        return [pop[i].copy() for i in winners]
 
     def _crossover(self, p1, p2):
         # OX Crossover sur la séquence
         s1 = self._ox_crossover(p1.sequence, p2.sequence)
         s2 = self._ox_crossover(p2.sequence, p1.sequence)
 
-        # Recréer blocs et machines (aléatoire ou hérité ?)
-        # On recrée tout pour simplifier
+        # Recréer les blocs, les machines sont héritées du parent dominant
         b1 = self._create_blocks(s1)
         b2 = self._create_blocks(s2)
-        m1 = [random.randint(0, len(self.machines)-1) for _ in range(len(b1))]
-        m2 = [random.randint(0, len(self.machines)-1) for _ in range(len(b2))]
+        m1 = self._inherit_machines(b1, p1.block_structure, p1.machine_assignments)
+        m2 = self._inherit_machines(b2, p2.block_structure, p2.machine_assignments)
 
         return Individual(s1, m1, b1), Individual(s2, m2, b2)
 
+    def _inherit_machines(self, blocks, parent_blocks, parent_machines):
+        """
+        Affecter à chaque nouveau bloc la machine du bloc parent avec lequel
+        il partage le plus de tâches (aléatoire si aucun recouvrement).
+        """
+        task_block = {}
+        for b_idx, bloc in enumerate(parent_blocks):
+            for task in bloc:
+                task_block[task] = b_idx
+
+        machines = []
+        for bloc in blocks:
+            overlap = Counter(task_block[t] for t in bloc if t in task_block)
+            if overlap:
+                b_idx = overlap.most_common(1)[0][0]
+                machines.append(parent_machines[b_idx])
+            else:
+                machines.append(self._random.randint(0, len(self.machines)-1))
+        return machines
+
     def _ox_crossover(self, seq1, seq2):
         size = len(seq1)
         if size < 2:
             return seq1.copy()
-        p1, p2 = sorted(random.sample(range(size), 2))
+        p1, p2 = sorted(self._random.sample(range(size), 2))
         child = [None]*size
         child[p1:p2] = seq1[p1:p2]
 
@@ -349,36 +636,107 @@ class GeneticAlgorithmScheduler:
         return child
 
     def _mutate(self, ind):
-        if random.random() < self.mutation_rate:
+        if self._random.random() < self.mutation_rate:
             if len(ind.sequence) < 2:
                 return
             # Swap 2 tâches
-            idx1, idx2 = random.sample(range(len(ind.sequence)), 2)
+            idx1, idx2 = self._random.sample(range(len(ind.sequence)), 2)
             ind.sequence[idx1], ind.sequence[idx2] = ind.sequence[idx2], ind.sequence[idx1]
-            # Recalculer blocs
+            # Recalculer blocs en conservant les machines des blocs inchangés
+            old_blocks = ind.block_structure
             ind.block_structure = self._create_blocks(ind.sequence)
-            # Ajuster machines
-            diff = len(ind.block_structure) - len(ind.machine_assignments)
-            if diff > 0:
-                ind.machine_assignments.extend(
-                    [random.randint(0, len(self.machines)-1) for _ in range(diff)])
-            else:
-                ind.machine_assignments = ind.machine_assignments[:len(
-                    ind.block_structure)]
+            ind.machine_assignments = self._inherit_machines(
+                ind.block_structure, old_blocks, ind.machine_assignments)
 
     def _replacement(self, pop, off):
         combined = pop + off
-        combined.sort(key=lambda x: x.fitness)
-        return combined[:self.population_size]
+        fitness = np.fromiter((ind.fitness for ind in combined),
+                              dtype=np.float64, count=len(combined))
+        order = np.argsort(fitness, kind='stable')[:self.population_size]
+        self._fit_buf = fitness[order]
+        return [combined[i] for i in order]
+
+
+def _simulate_kernel(task_idx, block_len, block_machine, n_machines, setup_time,
+                     n_pieces, duration, chargement, rotation, piece_key, is_op2, is_last):
+    """
+    Noyau de simulation sur tableaux numpy uniquement (compilable par numba).
+    Retourne (temps fin par machine, temps fin de chaque pièce).
+    """
+    machine_avail = np.zeros(n_machines)
+    op1_end = np.zeros(n_pieces)
+    piece_end = np.zeros(n_pieces)
+    pos = 0
+    for b in range(block_len.shape[0]):
+        m = block_machine[b]
+        start_time = machine_avail[m] + setup_time
+        for j in range(pos, pos + block_len[b]):
+            t = task_idx[j]
+            k = piece_key[t]
+            ready_time = start_time
+            if is_op2[t]:
+                ready_time = max(ready_time, op1_end[k] + rotation[t])
+            ready_time += chargement[t]
+            end_task = max(machine_avail[m], ready_time) + duration[t]
+            machine_avail[m] = end_task
+            start_time = end_task
+            if not is_op2[t]:
+                op1_end[k] = end_task
+            if is_last[t]:
+                piece_end[k] = end_task
+        pos += block_len[b]
+    return machine_avail, piece_end
+
+
+_simulate_jit = numba.njit(cache=True)(_simulate_kernel) if numba is not None else None
+
+
+# Copie du planificateur dans chaque processus d'évaluation (pool AG)
+_worker_scheduler = None
+
+
+def _init_worker(scheduler):
+    global _worker_scheduler
+    _worker_scheduler = scheduler
+
+
+def _evaluate_in_worker(genes):
+    """Évaluer un chromosome (blocs, machines) dans un processus du pool"""
+    block_structure, machine_assignments = genes
+    ind = Individual([], machine_assignments, block_structure)
+    _worker_scheduler._evaluate_fitness(ind)
+    return ind.fitness, ind.makespan, ind.total_delay
+
+
+def _popcount(mask: int) -> int:
+    """Nombre de bits à 1 d'un masque (nombre d'outils distincts)"""
+    return bin(mask).count('1')
+
+
+def _piece_offsets(of_data: Dict) -> Tuple[Dict[int, int], int]:
+    """
+    Numéroter les pièces de façon dense sur l'ensemble des OF.
+    Retourne (offset par OF, nombre total de pièces) : la pièce piece_idx de
+    l'OF of_id a pour index offset[of_id] + piece_idx.
+    """
+    offsets = {}
+    n_pieces = 0
+    for of_id, data in of_data.items():
+        offsets[of_id] = n_pieces
+        n_pieces += data['quantite']
+    return offsets, n_pieces
 
 
 def create_gantt_chart_data(individual: Individual, of_data: Dict, machines: List,
                             setup_time: int, start_date: datetime) -> List[Dict]:
     # Réimplémentation de la simulation pour générer les données Gantt
     # Similaire à _evaluate_fitness mais retourne les données détaillées
+    # Les temps sont simulés en minutes depuis start_date puis convertis en datetime
     gantt = []
-    machine_avail = {i: start_date for i in range(len(machines))}
-    of_op1_end = {}
+    append = gantt.append
+    machine_avail = np.zeros(len(machines))
+    piece_offset, n_pieces = _piece_offsets(of_data)
+    of_op1_end = np.zeros(n_pieces)
 
     for idx, block in enumerate(individual.block_structure):
         m_idx = individual.machine_assignments[idx]
@@ -386,52 +744,52 @@ def create_gantt_chart_data(individual: Individual, of_data: Dict, machines: Lis
 
         # Setup
         start_setup = machine_avail[m_idx]
-        end_setup = start_setup + timedelta(minutes=setup_time)
-        gantt.append({
+        end_setup = start_setup + setup_time
+        append({
             'task': f"Setup Bloc {idx+1}",
             'machine': m_name,
-            'start': start_setup,
-            'end': end_setup,
+            'start': start_date + timedelta(minutes=float(start_setup)),
+            'end': start_date + timedelta(minutes=float(end_setup)),
             'type': 'setup',
             'color': '#FFA500'
         })
 
         current_time = end_setup
 
-        for task in block:
-            of_id, piece_idx, op_code = task
-            op_info = of_data[of_id]['ops'][op_code]
+        for of_id, piece_idx, op_code in block:
+            # Entrée de l'OF et de l'opération résolues une fois par tâche
+            of_entry = of_data[of_id]
+            op_info = of_entry['ops'][op_code]
             # Duration pour UNE pièce
-            piece_duration = op_info['duration'] / of_data[of_id]['quantite']
-            duration = piece_duration
+            duration = op_info['duration'] / of_entry['quantite']
 
             # Précédence pour la même pièce
             ready_time = current_time
+            piece_key = piece_offset[of_id] + piece_idx
             if op_code == 'OP2':
-                piece_key = (of_id, piece_idx)
-                op1_end = of_op1_end.get(piece_key, start_date)
                 ready_time = max(
-                    ready_time, op1_end + timedelta(minutes=of_data[of_id]['duree_rotation']))
+                    ready_time, of_op1_end[piece_key] + of_entry['duree_rotation'])
 
-            ready_time += timedelta(minutes=of_data[of_id]['duree_chargement'])
+            ready_time += of_entry['duree_chargement']
 
             start_task = max(current_time, ready_time)
-            end_task = start_task + timedelta(minutes=duration)
+            end_task = start_task + duration
 
-            gantt.append({
-                'task': f"{of_data[of_id]['numero']}-P{piece_idx+1} {op_code}",
+            append({
+                'task': f"{of_entry['numero']}-P{piece_idx+1} {op_code}",
                 'machine': m_name,
-                'start': start_task,
-                'end': end_task,
+                'start': start_date + timedelta(minutes=float(start_task)),
+                'end': start_date + timedelta(minutes=float(end_task)),
                 'type': 'production',
                 'of_id': of_id,
                 'piece_idx': piece_idx,
+                'op_code': op_code,
+                'operation_id': op_info['id'],
                 'color': '#4CAF50' if op_code == 'OP1' else '#2196F3'
             })
 
             current_time = end_task
             if op_code == 'OP1':
-                piece_key = (of_id, piece_idx)
                 of_op1_end[piece_key] = end_task
 
         machine_avail[m_idx] = current_time
@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 from odoo import models, fields, api
-from odoo.exceptions import ValidationError
+from odoo.tools.sql import column_exists, create_column, table_exists
 
 class MachineCNC(models.Model):
     _name = 'machine.cnc'
@@ -18,7 +18,7 @@ class MachineCNC(models.Model):
         ('maintenance', 'En Maintenance')
     ], string='État Actuel', default='disponible')
     equipement_special = fields.Selection([('aucun', 'Aucun'), ('rotary', 'Rotary (4e axe)')], string='Équipement Spécial', default='aucun')
-    notes = fields.Text('Notes')
+    notes = fields.Text('Notes', prefetch=False)
 
 
 class MagasinStockage(models.Model):
@@ -102,17 +102,37 @@ class OperationFabrication(models.Model):
     
     code = fields.Char('Code', required=True) # UniqueID
     nom = fields.Char('Nom', required=True)
-    description = fields.Text('Description')
+    description = fields.Text('Description', prefetch=False)
     temps_standard = fields.Float('Temps Standard (min)', required=True)
     outil_ids = fields.Many2many('outil.fabrication', string='Outils Nécessaires')
     sequence = fields.Integer('Séquence', default=10)
     fichiers_3d_piece = fields.Char('Fichier 3D')
     nb_outils = fields.Integer('Nombre Outils', compute='_compute_nb_outils', store=True)
+    outil_ids_sorted = fields.Char('Outils (ids)', compute='_compute_nb_outils', store=True,
+                                   help="Ids triés des outils, séparés par des virgules")
 
     @api.depends('outil_ids')
     def _compute_nb_outils(self):
+        # Une seule requête groupée sur la table de relation (opérations enregistrées)
+        records = self.filtered('id')
+        tools_by_op = {}
+        if records:
+            self.flush_model(['outil_ids'])
+            self.env.cr.execute("""
+                SELECT operation_fabrication_id,
+                       ARRAY_AGG(outil_fabrication_id ORDER BY outil_fabrication_id)
+                FROM operation_fabrication_outil_fabrication_rel
+                WHERE operation_fabrication_id IN %s
+                GROUP BY operation_fabrication_id
+            """, (tuple(records.ids),))
+            tools_by_op = dict(self.env.cr.fetchall())
         for rec in self:
-            rec.nb_outils = len(rec.outil_ids)
+            if rec.id:
+                tool_ids = tools_by_op.get(rec.id, [])
+            else:
+                tool_ids = sorted(rec.outil_ids.ids)
+            rec.nb_outils = len(tool_ids)
+            rec.outil_ids_sorted = ','.join(str(tool_id) for tool_id in tool_ids)
 
 
 class PieceType(models.Model):
@@ -121,7 +141,7 @@ class PieceType(models.Model):
     
     nom = fields.Char('Nom', required=True)
     code = fields.Char('Code', required=True)
-    description = fields.Text('Description')
+    description = fields.Text('Description', prefetch=False)
     
     # Opérations spécifiques
     operation_01_id = fields.Many2one('operation.fabrication', string='Opération 1')
@@ -132,9 +152,9 @@ class PieceType(models.Model):
     
     # Anciens champs gardés pour compatibilité ou calculés
     operation_ids = fields.Many2many('operation.fabrication', string='Toutes Opérations')
-    temps_cycle = fields.Float('Temps Cycle Total (min)', compute='_compute_temps_cycle')
+    temps_cycle = fields.Float('Temps Cycle Total (min)', compute='_compute_temps_cycle', store=True)
 
-    @api.depends('operation_01_id', 'operation_02_id')
+    @api.depends('operation_01_id.temps_standard', 'operation_02_id.temps_standard')
     def _compute_temps_cycle(self):
         for rec in self:
             t1 = rec.operation_01_id.temps_standard if rec.operation_01_id else 0
@@ -149,13 +169,13 @@ class OrdreFabrication(models.Model):
     _inherit = ['mail.thread', 'mail.activity.mixin']
     
     # Identification
-    numero_of = fields.Char('Numéro OF', required=True, copy=False, tracking=True)
-    nom = fields.Char('Nom', compute='_compute_nom', store=True)
+    numero_of = fields.Char('Numéro OF', required=True, copy=False, tracking=True, index=True)
+    nom = fields.Char('Nom', readonly=True, help="Renseigné par le trigger SQL ordre_fabrication_nom_trg")
     reference_client = fields.Char('Référence Client')
     
     # Dates
-    date_creation = fields.Date('Date Création', default=fields.Date.context_today, readonly=True)
-    date_livraison = fields.Datetime('Date Livraison Prévue', required=True, tracking=True)
+    date_creation = fields.Date('Date Création', readonly=True, help="Renseignée par Postgres (DEFAULT CURRENT_DATE)")
+    date_livraison = fields.Datetime('Date Livraison Prévue', required=True, tracking=True, index=True)
     delai_fin_fab = fields.Datetime('Délai Fin Fab')
 
     # Planification
@@ -163,14 +183,14 @@ class OrdreFabrication(models.Model):
     date_fin_prevu = fields.Datetime('Fin Prévu', readonly=True)
     
     # Quantités
-    quantite = fields.Integer('Quantité Totale', required=True, default=1, tracking=True)
-    nb_pieces_prevues = fields.Integer('Nb Pièces Prévues', compute='_compute_nb_pieces_prevues', store=True)
+    quantite = fields.Integer('Quantité Totale', required=True, default=1)
+    nb_pieces_prevues = fields.Integer('Nb Pièces Prévues', related='quantite')
     nb_pieces_chargees = fields.Integer('Nb Pièces Chargées', readonly=True)
     nb_pieces_terminees = fields.Integer('Nb Pièces Terminées', readonly=True)
     quantite_restante = fields.Integer('Qté Restante', compute='_compute_quantites')
     
     # Technique
-    type_piece_id = fields.Many2one('piece.type', 'Type de Pièce', required=True, ondelete='restrict')
+    type_piece_id = fields.Many2one('piece.type', 'Type de Pièce', required=True, ondelete='restrict', auto_join=True)
     programme_CN = fields.Char('Programme CN')
     phase = fields.Selection([
         ('30', 'Phase 30 (OP1+OP2)'), 
@@ -183,10 +203,10 @@ class OrdreFabrication(models.Model):
     # Durées détaillées
     duree_chargement_machine_min = fields.Integer('Durée Chargement (min)', default=5)
     duree_rotation_table_min = fields.Integer('Durée Rotation (min)', default=2)
-    duree_usinage_min = fields.Integer('Durée Usinage (min)', compute='_compute_temps_total')
+    duree_usinage_min = fields.Float('Durée Usinage (min)', compute='_compute_duree_usinage', store=True)
     
     # Priorité et état
-    priorite = fields.Integer('Priorité', default=5, tracking=True, help="1=Urgent, 10=Basse")
+    priorite = fields.Integer('Priorité', default=5, index=True, help="1=Urgent, 10=Basse")
     state = fields.Selection([
         ('draft', 'Brouillon'),
         ('confirmed', 'Confirmé'),
@@ -194,10 +214,10 @@ class OrdreFabrication(models.Model):
         ('in_progress', 'En Cours'),
         ('done', 'Terminé'),
         ('cancel', 'Annulé'),
-    ], default='draft', tracking=True)
+    ], default='draft', tracking=True, index=True)
     
     # Relations
-    operation_ids = fields.Many2many('operation.fabrication', string='Opérations', compute='_compute_operations', store=True)
+    operation_ids = fields.Many2many('operation.fabrication', string='Opérations', compute='_compute_operations', compute_sudo=True)
     bloc_id = fields.Many2one('bloc.production', 'Bloc', readonly=True, ondelete='set null')
     machine_assignee_id = fields.Many2one('machine.cnc', 'Machine Assignée', readonly=True)
     piece_ids = fields.One2many('piece.fabrication', 'of_id', 'Pièces')
@@ -205,25 +225,115 @@ class OrdreFabrication(models.Model):
     # Calculs
     temps_total_estime = fields.Float('Temps Total (min)', compute='_compute_temps_total', store=True)
     nombre_outils_requis = fields.Integer('Outils Requis', compute='_compute_outils_requis', store=True)
+    tool_ids_cache = fields.Char('Outils (ids)', compute='_compute_outils_requis', store=True,
+                                 help="Ids triés des outils requis, séparés par des virgules")
     
     # Retard
-    retard_jours = fields.Integer('Retard (jours)', compute='_compute_retard')
-    est_en_retard = fields.Boolean('En Retard?', compute='_compute_retard')
-    
-    notes = fields.Text('Notes')
-    
-    @api.depends('numero_of', 'type_piece_id')
-    def _compute_nom(self):
-        for rec in self:
-            if rec.type_piece_id:
-                rec.nom = f"{rec.numero_of} - {rec.type_piece_id.nom}"
-            else:
-                rec.nom = rec.numero_of
-
-    @api.depends('quantite')
-    def _compute_nb_pieces_prevues(self):
-        for rec in self:
-            rec.nb_pieces_prevues = rec.quantite
+    retard_jours = fields.Integer('Retard (jours)', compute='_compute_retard', store=True)
+    est_en_retard = fields.Boolean('En Retard?', compute='_compute_retard', store=True)
+    
+    notes = fields.Text('Notes', prefetch=False)
+
+    _sql_constraints = [
+        ('quantite_positive', 'CHECK(quantite > 0)', "La quantité doit être positive"),
+        ('priorite_range', 'CHECK(priorite BETWEEN 1 AND 10)', "La priorité doit être entre 1 et 10"),
+    ]
+
+    def _auto_init(self):
+        # Colonnes calculées stockées ajoutées sur une base existante : créées
+        # et remplies en SQL, sinon l'ORM recalcule chaque OF en Python
+        cr = self.env.cr
+        if table_exists(cr, self._table):
+            if not column_exists(cr, self._table, 'tool_ids_cache'):
+                if not column_exists(cr, self._table, 'nombre_outils_requis'):
+                    create_column(cr, self._table, 'nombre_outils_requis', 'int4')
+                create_column(cr, self._table, 'tool_ids_cache', 'varchar')
+                self._init_outils_requis_column()
+            if not column_exists(cr, self._table, 'duree_usinage_min'):
+                create_column(cr, self._table, 'duree_usinage_min', 'float8')
+                cr.execute("""
+                    UPDATE ordre_fabrication ofab
+                    SET duree_usinage_min = ofab.quantite * (
+                        COALESCE(op1.temps_standard, 0)
+                        + CASE WHEN ofab.phase IN ('30', '40')
+                               THEN COALESCE(op2.temps_standard, 0) ELSE 0 END)
+                    FROM piece_type pt
+                    LEFT JOIN operation_fabrication op1 ON op1.id = pt.operation_01_id
+                    LEFT JOIN operation_fabrication op2 ON op2.id = pt.operation_02_id
+                    WHERE pt.id = ofab.type_piece_id
+                """)
+        return super()._auto_init()
+
+    def _init_outils_requis_column(self):
+        cr = self.env.cr
+        cr.execute("UPDATE ordre_fabrication SET nombre_outils_requis = 0")
+        cr.execute("""
+            UPDATE ordre_fabrication ofab
+            SET nombre_outils_requis = sub.nb, tool_ids_cache = sub.tool_ids
+            FROM (
+                SELECT ofab2.id,
+                       COUNT(DISTINCT rel.outil_fabrication_id) AS nb,
+                       ARRAY_TO_STRING(ARRAY_AGG(DISTINCT rel.outil_fabrication_id
+                                                 ORDER BY rel.outil_fabrication_id), ',') AS tool_ids
+                FROM ordre_fabrication ofab2
+                JOIN piece_type pt ON pt.id = ofab2.type_piece_id
+                JOIN operation_fabrication_outil_fabrication_rel rel
+                    ON rel.operation_fabrication_id = pt.operation_01_id
+                    OR (rel.operation_fabrication_id = pt.operation_02_id
+                        AND ofab2.phase IN ('30', '40'))
+                GROUP BY ofab2.id
+            ) sub
+            WHERE ofab.id = sub.id
+        """)
+
+    def init(self):
+        # Index partiel : le filtre "en retard" ne parcourt que les OF concernés,
+        # déjà triés par date de livraison
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS ordre_fabrication_en_retard_idx
+            ON ordre_fabrication (date_livraison) WHERE est_en_retard
+        """)
+        # Index composite aligné sur _order (liste triée sans tri complet)
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS ordre_fabrication_order_idx
+            ON ordre_fabrication (priorite DESC, date_livraison)
+        """)
+        # Date de création remplie côté serveur, sans appel Python par OF
+        self.env.cr.execute("""
+            ALTER TABLE ordre_fabrication ALTER COLUMN date_creation SET DEFAULT CURRENT_DATE
+        """)
+        # nom = "numero_of - type de pièce", calculé par Postgres à l'écriture
+        self.env.cr.execute("""
+            CREATE OR REPLACE FUNCTION ordre_fabrication_set_nom() RETURNS trigger AS $$
+            BEGIN
+                NEW.nom := COALESCE(
+                    NEW.numero_of || ' - ' || (SELECT nom FROM piece_type WHERE id = NEW.type_piece_id),
+                    NEW.numero_of);
+                RETURN NEW;
+            END;
+            $$ LANGUAGE plpgsql;
+
+            DROP TRIGGER IF EXISTS ordre_fabrication_nom_trg ON ordre_fabrication;
+            CREATE TRIGGER ordre_fabrication_nom_trg
+            BEFORE INSERT OR UPDATE OF numero_of, type_piece_id ON ordre_fabrication
+            FOR EACH ROW EXECUTE PROCEDURE ordre_fabrication_set_nom();
+        """)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        # nom (trigger SQL) et date_creation (DEFAULT CURRENT_DATE) sont
+        # renseignés par Postgres à l'insertion : le cache les croit vides
+        records.invalidate_recordset(['nom', 'date_creation'])
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'numero_of' in vals or 'type_piece_id' in vals:
+            # Exécuter l'UPDATE pour que le trigger SQL recalcule nom
+            self.flush_recordset(['numero_of', 'type_piece_id'])
+            self.invalidate_recordset(['nom'])
+        return res
     
     @api.depends('quantite', 'nb_pieces_terminees')
     def _compute_quantites(self):
@@ -232,70 +342,159 @@ class OrdreFabrication(models.Model):
 
     @api.depends('type_piece_id', 'phase')
     def _compute_operations(self):
+        # Lecture groupée des types de pièce du lot (operation_01/02 en une requête)
+        self.mapped('type_piece_id').mapped('operation_01_id')
         for rec in self:
-            ops = []
-            if rec.type_piece_id:
-                if rec.phase in ['30', '40']: # OP1 + OP2 or sequence
-                    if rec.type_piece_id.operation_01_id:
-                        ops.append(rec.type_piece_id.operation_01_id.id)
-                    if rec.type_piece_id.operation_02_id:
-                        ops.append(rec.type_piece_id.operation_02_id.id)
-                else: # Single OP
-                    if rec.type_piece_id.operation_01_id:
-                        ops.append(rec.type_piece_id.operation_01_id.id)
-            rec.operation_ids = [(6, 0, ops)]
-    
-    @api.depends('operation_ids', 'quantite', 'duree_chargement_machine_min', 'duree_rotation_table_min')
+            type_piece = rec.type_piece_id
+            op1_id = type_piece.operation_01_id.id
+            if rec.phase in ['30', '40']: # OP1 + OP2 or sequence
+                ops = [op_id for op_id in (op1_id, type_piece.operation_02_id.id) if op_id]
+            else: # Single OP
+                ops = [op1_id] if op1_id else []
+            rec.operation_ids = self.env['operation.fabrication'].browse(ops)
+    
+    @api.depends('phase', 'quantite',
+                 'type_piece_id.operation_01_id.temps_standard',
+                 'type_piece_id.operation_02_id.temps_standard')
+    def _compute_duree_usinage(self):
+        # Temps standard cumulés par OF en une requête (mêmes règles OP1/OP2
+        # que _compute_operations), pour les OF déjà enregistrés
+        records = self.filtered('id')
+        temps_by_of = {}
+        if records:
+            self.flush_model(['type_piece_id', 'phase'])
+            self.env['piece.type'].flush_model(['operation_01_id', 'operation_02_id'])
+            self.env['operation.fabrication'].flush_model(['temps_standard'])
+            self.env.cr.execute("""
+                SELECT ofab.id,
+                       COALESCE(op1.temps_standard, 0)
+                       + CASE WHEN ofab.phase IN ('30', '40')
+                              THEN COALESCE(op2.temps_standard, 0) ELSE 0 END
+                FROM ordre_fabrication ofab
+                JOIN piece_type pt ON pt.id = ofab.type_piece_id
+                LEFT JOIN operation_fabrication op1 ON op1.id = pt.operation_01_id
+                LEFT JOIN operation_fabrication op2 ON op2.id = pt.operation_02_id
+                WHERE ofab.id IN %s
+            """, (tuple(records.ids),))
+            temps_by_of = dict(self.env.cr.fetchall())
+        for rec in self:
+            if rec.id:
+                temps_piece = temps_by_of.get(rec.id, 0.0)
+            else:
+                # Enregistrement non sauvegardé (onchange) : calcul ORM
+                temps_piece = sum(rec.operation_ids.mapped('temps_standard'))
+            rec.duree_usinage_min = temps_piece * rec.quantite
+
+    @api.depends('duree_usinage_min', 'duree_chargement_machine_min', 'duree_rotation_table_min')
     def _compute_temps_total(self):
+        # Simple somme : modifier chargement/rotation ne relance pas l'usinage
         for rec in self:
-            usinage = sum(op.temps_standard * rec.quantite for op in rec.operation_ids)
-            rec.duree_usinage_min = int(usinage)
-            total = usinage + rec.duree_chargement_machine_min + rec.duree_rotation_table_min
-            rec.temps_total_estime = total
+            rec.temps_total_estime = (rec.duree_usinage_min + rec.duree_chargement_machine_min
+                                      + rec.duree_rotation_table_min)
     
-    @api.depends('operation_ids')
+    @api.depends('phase',
+                 'type_piece_id.operation_01_id.outil_ids',
+                 'type_piece_id.operation_02_id.outil_ids')
     def _compute_outils_requis(self):
+        # Une seule requête SQL pour tout le lot (OF déjà enregistrés).
+        # operation_ids n'est pas stocké : mêmes règles que _compute_operations
+        # (OP1 toujours, OP2 seulement en phase 30/40) appliquées en SQL.
+        records = self.filtered('id')
+        tools_by_of = {}
+        if records:
+            self.flush_model(['type_piece_id', 'phase'])
+            self.env['piece.type'].flush_model(['operation_01_id', 'operation_02_id'])
+            self.env['operation.fabrication'].flush_model(['outil_ids'])
+            self.env.cr.execute("""
+                SELECT ofab.id,
+                       ARRAY_AGG(DISTINCT rel.outil_fabrication_id ORDER BY rel.outil_fabrication_id)
+                FROM ordre_fabrication ofab
+                JOIN piece_type pt ON pt.id = ofab.type_piece_id
+                JOIN operation_fabrication_outil_fabrication_rel rel
+                    ON rel.operation_fabrication_id = pt.operation_01_id
+                    OR (rel.operation_fabrication_id = pt.operation_02_id
+                        AND ofab.phase IN ('30', '40'))
+                WHERE ofab.id IN %s
+                GROUP BY ofab.id
+            """, (tuple(records.ids),))
+            tools_by_of = dict(self.env.cr.fetchall())
         for rec in self:
-            tools = rec.operation_ids.mapped('outil_ids')
-            rec.nombre_outils_requis = len(tools)
+            if rec.id:
+                tool_ids = tools_by_of.get(rec.id, [])
+            else:
+                # Enregistrement non sauvegardé (onchange) : calcul ORM
+                tool_ids = sorted(rec.operation_ids.mapped('outil_ids').ids)
+            rec.nombre_outils_requis = len(tool_ids)
+            rec.tool_ids_cache = ','.join(str(tool_id) for tool_id in tool_ids)
     
     @api.depends('date_fin_prevu', 'date_livraison')
     def _compute_retard(self):
         for rec in self:
-            if rec.date_fin_prevu and rec.date_livraison:
-                delta = (rec.date_fin_prevu - rec.date_livraison).days
-                rec.retard_jours = max(0, delta)
-                rec.est_en_retard = delta > 0
-            else:
-                rec.retard_jours = 0
-                rec.est_en_retard = False
-    
+            date_fin, date_livraison = rec.date_fin_prevu, rec.date_livraison
+            delta = (date_fin - date_livraison).days if date_fin and date_livraison else 0
+            rec.retard_jours = max(0, delta)
+            rec.est_en_retard = delta > 0
+    
+    @api.model
+    def create_bulk(self, vals_list):
+        """Création en masse (import, jeux de scénarios) sans suivi mail."""
+        return self.with_context(
+            tracking_disable=True,
+            mail_create_nolog=True,
+            mail_create_nosubscribe=True,
+            mail_notrack=True,
+        ).create(vals_list)
+
+    def _generate_pieces(self):
+        """Créer les pièces manquantes des OF en un seul create groupé.
+
+        Les numéros de série déjà présents sont ignorés : un second appel ne
+        crée pas de doublon, seules les pièces ajoutées depuis sont créées.
+        """
+        vals_list = []
+        for of in self:
+            existing = set(of.piece_ids.mapped('numero_serie'))
+            vals_list += [
+                {'of_id': of.id, 'numero_serie': f"{i:05d}"}
+                for i in range(1, of.quantite + 1)
+                if f"{i:05d}" not in existing
+            ]
+        return self.env['piece.fabrication'].create(vals_list)
+
+    @api.model
+    def dashboard_counts(self):
+        """Nombre d'OF actifs par machine et par état (un seul GROUP BY SQL)."""
+        return self.read_group(
+            [('state', 'in', ['confirmed', 'scheduled', 'in_progress'])],
+            ['machine_assignee_id', 'state'],
+            ['machine_assignee_id', 'state'],
+            lazy=False,
+        )
+
+    @api.model
+    def stats_par_etat(self, domain=None):
+        """Totaux pièces / quantités / outils par état, sommés par Postgres."""
+        return self.read_group(
+            domain or [],
+            ['nb_pieces_terminees:sum', 'quantite:sum', 'nombre_outils_requis:sum'],
+            ['state'],
+        )
+
     def action_confirm(self):
-        self.state = 'confirmed'
+        # Une seule écriture groupée, limitée aux OF qui changent d'état
+        self.filtered(lambda r: r.state != 'confirmed').write({'state': 'confirmed'})
     
     def action_cancel(self):
-        self.state = 'cancel'
-    
-    @api.constrains('quantite')
-    def _check_quantite(self):
-        for rec in self:
-            if rec.quantite <= 0:
-                raise ValidationError("La quantité doit être positive")
-    
-    @api.constrains('priorite')
-    def _check_priorite(self):
-        for rec in self:
-            if not (1 <= rec.priorite <= 10):
-                raise ValidationError("La priorité doit être entre 1 et 10")
+        self.filtered(lambda r: r.state != 'cancel').write({'state': 'cancel'})
 
 
 class PieceFabrication(models.Model):
     _name = 'piece.fabrication'
     _description = 'Pièce Individuelle'
     
-    nom = fields.Char('Nom', compute='_compute_nom')
+    nom = fields.Char('Nom', compute='_compute_nom', store=True)
     numero_serie = fields.Char('N° Série', required=True)
-    of_id = fields.Many2one('ordre.fabrication', 'OF', required=True, ondelete='cascade')
+    of_id = fields.Many2one('ordre.fabrication', 'OF', required=True, ondelete='cascade', auto_join=True)
     type_piece_id = fields.Many2one('piece.type', related='of_id.type_piece_id', store=True)
     
     state = fields.Selection([
@@ -315,8 +514,10 @@ class PieceFabrication(models.Model):
     
     emplacement_magasin = fields.Char('Emplacement Magasin')
     
-    @api.depends('numero_serie', 'of_id')
+    @api.depends('numero_serie', 'of_id.numero_of')
     def _compute_nom(self):
+        # Lecture groupée des numéros d'OF avant la boucle
+        self.mapped('of_id').mapped('numero_of')
         for rec in self:
             rec.nom = f"{rec.of_id.numero_of}-{rec.numero_serie}" if rec.of_id else rec.numero_serie
 
@@ -349,9 +550,17 @@ class PlanningTimeline(models.Model):
     machine_id = fields.Many2one('machine.cnc', 'Machine')
     date_debut = fields.Datetime('Début', required=True)
     date_fin = fields.Datetime('Fin', required=True)
-    duree = fields.Float('Durée (min)')
+    duree = fields.Float('Durée (min)', compute='_compute_duree', store=True)
     type_activite = fields.Selection([
         ('setup', 'Setup'), 
         ('production', 'Production'),
         ('transfert', 'Transfert')
-    ], required=True)
\ No newline at end of file
+    ], required=True)
+
+    @api.depends('date_debut', 'date_fin')
+    def _compute_duree(self):
+        for rec in self:
+            if rec.date_debut and rec.date_fin:
+                rec.duree = (rec.date_fin - rec.date_debut).total_seconds() / 60.0
+            else:
+                rec.duree = 0.0
@@ -3,22 +3,24 @@ from odoo import models, fields, api, _
 from odoo.exceptions import UserError, ValidationError
 from datetime import datetime, timedelta
 import logging
-import base64
+import functools
+import gzip
+from collections import defaultdict
 from io import BytesIO
 from datetime import datetime, time
 
 try:
-    import openpyxl
-    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-    from openpyxl.utils import get_column_letter
+    import xlsxwriter
 except ImportError:
-    openpyxl = None
+    xlsxwriter = None
 
 _logger = logging.getLogger(__name__)
 
 try:
     from .genetic_algorithm_scheduler import GeneticAlgorithmScheduler, create_gantt_chart_data
     from .gantt_chart_generator import GanttChartGenerator, generate_statistics_report
+    import plotly.io as pio
+    from ..controllers.main import PLOTLYJS_URL
     AG_AVAILABLE = True
 except ImportError:
     AG_AVAILABLE = False
@@ -26,6 +28,28 @@ except ImportError:
         "AG non disponible. Installez: pip install plotly pandas numpy")
 
 
+@functools.lru_cache(maxsize=8)
+def _html_from_json(figure_json):
+    """HTML (octets UTF-8) d'une figure Plotly sérialisée en JSON"""
+    return pio.from_json(figure_json).to_html(include_plotlyjs=PLOTLYJS_URL).encode('utf-8')
+
+
+# Cadres des graphiques HTML (pièces jointes) affichés dans le formulaire
+_IFRAME_TMPL = ('<iframe src="/planificateur_cnc/chart/{id}" '
+                'style="width:100%; height:{height}px; border:none;"></iframe>')
+_EMPTY_GANTT = '<p>Aucun diagramme disponible</p>'
+_EMPTY_CONVERGENCE = '<p>Aucun graphique disponible</p>'
+
+
+# Objectif du planificateur -> objectif de l'AG
+GA_OBJECTIVES = {
+    'minimize_delays': 'delay',
+    'minimize_makespan': 'makespan',
+    'maximize_production': 'makespan',
+    'balance_load': 'balance',
+}
+
+
 class PlanificateurCNC(models.Model):
     _name = 'planificateur.cnc'
     _description = 'Planificateur CNC avec Algorithme Génétique'
@@ -39,11 +63,12 @@ class PlanificateurCNC(models.Model):
     date_debut = fields.Date('Date Début', required=True, tracking=True)
     date_fin = fields.Date('Date Fin', required=True, tracking=True)
     horizon_planification = fields.Integer(
-        'Horizon (jours)', compute='_compute_horizon')
+        'Horizon (jours)', compute='_compute_horizon', store=True)
 
     state = fields.Selection([
         ('draft', 'Brouillon'),
         ('validated', 'Validé'),
+        ('optimizing', 'Optimisation en cours'),
         ('optimized', 'Optimisé'),
         ('scheduled', 'Planifié'),
         ('done', 'Terminé'),
@@ -84,12 +109,39 @@ class PlanificateurCNC(models.Model):
         'Taux Croisement', default=0.8, digits=(3, 2))
     ga_mutation_rate = fields.Float(
         'Taux Mutation', default=0.2, digits=(3, 2))
+    ga_num_workers = fields.Integer(
+        'Processus AG', default=1,
+        help="Nombre de processus pour évaluer la population en parallèle "
+             "(1 = séquentiel). Utile pour les grandes populations.")
+    job_uuid = fields.Char('Job AG', readonly=True, copy=False)
+    etat_avant_optimisation = fields.Char(
+        'État avant optimisation', readonly=True, copy=False,
+        help="État restauré si le job AG échoue, est annulé ou disparaît.")
+    ga_progress = fields.Float(
+        'Progression AG (%)', readonly=True, copy=False,
+        help="Avancement de l'optimisation en tâche de fond (queue_job).")
+    ga_patience = fields.Integer(
+        'Patience AG', default=30,
+        help="Arrêter l'AG après ce nombre de générations sans amélioration "
+             "(0 = toujours exécuter toutes les générations).")
+    ga_tol = fields.Float(
+        'Tolérance AG', default=0.001, digits=(6, 4),
+        help="Amélioration relative minimale de la meilleure fitness pour "
+             "ne pas être considérée comme un plateau.")
+    ga_seed = fields.Integer(
+        'Graine AG', default=0,
+        help="Graine aléatoire de l'AG : une valeur non nulle rend "
+             "l'optimisation reproductible (0 = aléatoire).")
+    ga_fitness_cache_size = fields.Integer(
+        'Cache Fitness', default=400,
+        help="Nombre de chromosomes dont l'évaluation est conservée pour "
+             "éviter de re-simuler les doublons (0 = désactivé).")
 
     # Résultats d'optimisation
     makespan_final = fields.Float(
         'Makespan (min)', readonly=True, digits=(16, 2))
     makespan_hours = fields.Float(
-        'Makespan (h)', compute='_compute_makespan_hours')
+        'Makespan (h)', compute='_compute_makespan_hours', store=True)
     total_delay = fields.Float(
         'Retard Total (min)', readonly=True, digits=(16, 2))
     machine_balance = fields.Float(
@@ -99,12 +151,12 @@ class PlanificateurCNC(models.Model):
 
     # Statistiques
     nb_of_total = fields.Integer(
-        'Nombre OF Total', compute='_compute_statistics')
+        'Nombre OF Total', compute='_compute_counts', store=True)
     nb_of_optimises = fields.Integer(
-        'Nombre OF Optimisés', compute='_compute_statistics')
-    nb_blocs = fields.Integer('Nombre de Blocs', compute='_compute_statistics')
+        'Nombre OF Optimisés', compute='_compute_counts', store=True)
+    nb_blocs = fields.Integer('Nombre de Blocs', compute='_compute_counts', store=True)
     taux_utilisation = fields.Float(
-        'Taux Utilisation (%)', compute='_compute_statistics')
+        'Taux Utilisation (%)', compute='_compute_utilisation', store=True)
 
     # Visualisations
     gantt_attachment_id = fields.Many2one(
@@ -112,6 +164,9 @@ class PlanificateurCNC(models.Model):
     convergence_attachment_id = fields.Many2one(
         'ir.attachment', string="Convergence Attachment", readonly=True)
     statistics_report = fields.Text('Statistiques', readonly=True)
+    gantt_json = fields.Text(
+        'Gantt (JSON)', readonly=True, copy=False, prefetch=False,
+        help="Figure Plotly du Gantt, pour régénérer le HTML sans recalcul")
     gantt_iframe_html = fields.Html(
         'Gantt Iframe',
         compute='_compute_gantt_iframe',
@@ -123,9 +178,9 @@ class PlanificateurCNC(models.Model):
         sanitize=False
     )
 
-    # Export
-    excel_file = fields.Binary('Fichier Excel', readonly=True)
-    excel_filename = fields.Char('Nom Fichier')
+    # Export : dernier classeur généré, stocké en pièce jointe
+    excel_attachment_id = fields.Many2one(
+        'ir.attachment', string="Fichier Excel", readonly=True, copy=False)
 
     # Notes
     notes = fields.Text('Notes')
@@ -133,34 +188,49 @@ class PlanificateurCNC(models.Model):
     @api.depends('convergence_attachment_id')
     def _compute_convergence_iframe(self):
         for rec in self:
-            if rec.convergence_attachment_id:
-                rec.convergence_iframe_html = f'''
-                    <iframe src="/web/content/{rec.convergence_attachment_id.id}"
-                            style="width:100%; height:400px; border:none;">
-                    </iframe>
-                '''
-            else:
-                rec.convergence_iframe_html = '<p>Aucun graphique disponible</p>'
+            attachment = rec.convergence_attachment_id
+            rec.convergence_iframe_html = _IFRAME_TMPL.format(
+                id=attachment.id, height=400) if attachment else _EMPTY_CONVERGENCE
+
+    def action_rebuild_html(self):
+        """Régénérer le HTML du Gantt depuis la figure JSON enregistrée"""
+        self.ensure_one()
+        if not self.gantt_json:
+            raise UserError("Aucun diagramme à régénérer : lancez une optimisation.")
+        old_attachment = self.gantt_attachment_id
+        self.gantt_attachment_id = self._create_html_attachment(
+            f'gantt_{self.id}.html.gz', _html_from_json(self.gantt_json)).id
+        old_attachment.unlink()
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'current',
+        }
+
+    def action_view_gantt(self):
+        """Ouvrir le Gantt dans un nouvel onglet"""
+        return {
+            'type': 'ir.actions.act_url',
+            'url': f'/planificateur_cnc/chart/{self.gantt_attachment_id.id}',
+            'target': 'new',
+        }
 
     def action_view_convergence(self):
         """Ouvrir la convergence dans un nouvel onglet"""
         return {
             'type': 'ir.actions.act_url',
-            'url': f'/web/content/{self.convergence_attachment_id.id}',
+            'url': f'/planificateur_cnc/chart/{self.convergence_attachment_id.id}',
             'target': 'new',
         }
 
     @api.depends('gantt_attachment_id')
     def _compute_gantt_iframe(self):
         for rec in self:
-            if rec.gantt_attachment_id:
-                rec.gantt_iframe_html = f'''
-                        <iframe src="/web/content/{rec.gantt_attachment_id.id}"
-                                style="width:100%; height:600px; border:none;">
-                        </iframe>
-                    '''
-            else:
-                rec.gantt_iframe_html = '<p>Aucun diagramme disponible</p>'
+            attachment = rec.gantt_attachment_id
+            rec.gantt_iframe_html = _IFRAME_TMPL.format(
+                id=attachment.id, height=600) if attachment else _EMPTY_GANTT
 
     @api.depends('date_debut', 'date_fin')
     def _compute_horizon(self):
@@ -176,17 +246,33 @@ class PlanificateurCNC(models.Model):
         for rec in self:
             rec.makespan_hours = rec.makespan_final / 60.0 if rec.makespan_final else 0
 
-    @api.depends('of_candidat_ids', 'of_selectionne_ids', 'bloc_production_ids', 'makespan_final')
-    def _compute_statistics(self):
+    @api.depends('of_candidat_ids', 'of_selectionne_ids', 'bloc_production_ids')
+    def _compute_counts(self):
         for rec in self:
             rec.nb_of_total = len(rec.of_candidat_ids)
             rec.nb_of_optimises = len(rec.of_selectionne_ids)
             rec.nb_blocs = len(rec.bloc_production_ids)
 
+    @api.depends('machine_ids', 'makespan_final', 'bloc_production_ids.duree_totale')
+    def _compute_utilisation(self):
+        # Durée cumulée des blocs : un seul GROUP BY pour le lot
+        bloc_durations = {}
+        saved = self.filtered('id')
+        if saved:
+            groups = self.env['bloc.production'].read_group(
+                [('planificateur_id', 'in', saved.ids)],
+                ['planificateur_id', 'duree_totale:sum'], ['planificateur_id'])
+            bloc_durations = {g['planificateur_id'][0]: g['duree_totale'] for g in groups}
+
+        for rec in self:
+            if rec.id:
+                total_used = bloc_durations.get(rec.id, 0.0)
+            else:
+                # Enregistrement non sauvegardé (onchange) : blocs en cache
+                total_used = sum(rec.bloc_production_ids.mapped('duree_totale'))
+
             if rec.makespan_final and len(rec.machine_ids) > 0:
                 total_capacity = rec.makespan_final * len(rec.machine_ids)
-                total_used = sum(
-                    b.duree_totale for b in rec.bloc_production_ids)
                 rec.taux_utilisation = (
                     total_used / total_capacity * 100) if total_capacity else 0
             else:
@@ -210,14 +296,100 @@ class PlanificateurCNC(models.Model):
         if not self.machine_ids:
             raise UserError("Aucune machine.")
 
-        if self.use_genetic_algorithm and AG_AVAILABLE:
-            return self._optimize_with_ga()
-        else:
+        if not (self.use_genetic_algorithm and AG_AVAILABLE):
             return self._optimize_heuristic()
 
+        # Module queue_job installé : l'AG tourne dans un job, le worker HTTP
+        # est libéré immédiatement
+        if 'queue.job' in self.env and hasattr(self, 'with_delay'):
+            previous_state = self.state
+            self.write({
+                'state': 'optimizing',
+                'ga_progress': 0,
+                'etat_avant_optimisation': previous_state,
+            })
+            job = self.with_delay(
+                description=f"Optimisation AG - {self.nom}",
+            )._optimize_with_ga_job(previous_state)
+            self.job_uuid = job.uuid
+            return True
+        return self._optimize_with_ga()
+
+    def _optimize_with_ga_job(self, previous_state):
+        """Exécution de l'AG en tâche de fond (queue_job)"""
+        self.ensure_one()
+        # Scénario réinitialisé ou relancé depuis : ce job n'a plus d'objet
+        # (cas d'une reprise après erreur de concurrence ou d'un job relancé)
+        job_uuid = self.env.context.get('job_uuid')
+        if self.state != 'optimizing' or (job_uuid and job_uuid != self.job_uuid):
+            return "Scénario %s : optimisation abandonnée (état %s)" % (self.id, self.state)
+        try:
+            self.with_context(ga_commit_progress=True)._optimize_with_ga()
+        except Exception:
+            self.env.cr.rollback()
+            self.write({'state': previous_state, 'ga_progress': 0})
+            self.env.cr.commit()
+            raise
+        return True
+
+    def _ga_progress_callback(self):
+        """Progression de l'AG environ tous les 5 % (job uniquement)
+
+        Écrite par un curseur séparé, committé aussitôt : la transaction du
+        job ne verrouille pas la ligne du scénario pendant l'AG.
+        """
+        if not self.env.context.get('ga_commit_progress'):
+            return None
+        total = max(1, self.ga_generations)
+        step = max(1, total // 20)
+        planner_id = self.id
+
+        def callback(generation, best_fitness):
+            if generation % step == 0:
+                with self.pool.cursor() as cr:
+                    cr.execute(
+                        "UPDATE planificateur_cnc SET ga_progress = %s WHERE id = %s",
+                        (100.0 * generation / total, planner_id))
+
+        return callback
+
+    def _cancel_ga_job(self):
+        """Annuler le job AG encore en attente (l'AG déjà démarré n'écrira
+        pas : voir la garde de _optimize_with_ga_job)"""
+        uuids = [uuid for uuid in self.mapped('job_uuid') if uuid]
+        if uuids and 'queue.job' in self.env:
+            self.env['queue.job'].sudo().search([
+                ('uuid', 'in', uuids),
+                ('state', 'in', ('wait_dependencies', 'pending', 'enqueued')),
+            ]).button_cancelled()
+
+    @api.model
+    def _cron_check_ga_jobs(self):
+        """Sortir de 'optimizing' les scénarios dont le job AG a échoué,
+        a été annulé, s'est terminé sans résultat ou n'existe plus"""
+        planners = self.search([('state', '=', 'optimizing')])
+        if not planners:
+            return
+        job_states = {}
+        if 'queue.job' in self.env:
+            jobs = self.env['queue.job'].sudo().search(
+                [('uuid', 'in', [uuid for uuid in planners.mapped('job_uuid') if uuid])])
+            job_states = {job.uuid: job.state for job in jobs}
+        for planner in planners:
+            if job_states.get(planner.job_uuid) in ('failed', 'cancelled', 'done', None):
+                _logger.warning("Job AG %s du scénario %s perdu (%s) : état restauré",
+                                planner.job_uuid, planner.id,
+                                job_states.get(planner.job_uuid, 'introuvable'))
+                planner.write({
+                    'state': planner.etat_avant_optimisation or 'validated',
+                    'ga_progress': 0,
+                    'job_uuid': False,
+                })
+
     def action_reset(self):
         """Réinitialise le planificateur pour permettre une nouvelle optimisation"""
         self.ensure_one()
+        self._cancel_ga_job()
 
         # Supprimer les résultats précédents
         self.write({
@@ -229,12 +401,14 @@ class PlanificateurCNC(models.Model):
             'gantt_attachment_id': False,
             'convergence_attachment_id': False,
             'statistics_report': False,
-            'excel_file': False,
-            'excel_filename': False,
+            'excel_attachment_id': False,
+            'gantt_json': False,
+            'ga_progress': 0,
+            'job_uuid': False,
+            'etat_avant_optimisation': False,
         })
 
-        self.bloc_production_ids.unlink()
-        self.timeline_ids.unlink()
+        self._delete_results()
         self.of_selectionne_ids = [(5, 0, 0)]
 
         return {
@@ -251,9 +425,21 @@ class PlanificateurCNC(models.Model):
 
         try:
             tool_capacity = self.machine_ids[0].capacite_magasin or 40
+            # Origine des temps calculée une seule fois : l'AG, la timeline et
+            # le Gantt partagent exactement la même date de départ
+            start_dt = datetime.combine(
+                self.date_debut, datetime.min.time()) if self.date_debut else datetime.now()
+
+            # Charger en quelques requêtes groupées tout ce que lit l'AG
+            # (OF -> type de pièce -> opérations -> outils) avant de le parcourir
+            ofs = self.of_candidat_ids
+            ofs.mapped('type_piece_id.montage_id')
+            operations = ofs.mapped('type_piece_id.operation_01_id') | \
+                ofs.mapped('type_piece_id.operation_02_id')
+            operations.mapped('outil_ids.quantite_requise')
 
             ga = GeneticAlgorithmScheduler(
-                ofs=self.of_candidat_ids,
+                ofs=ofs,
                 machines=self.machine_ids,
                 setup_time=self.temps_setup,
                 tool_capacity=tool_capacity,
@@ -261,12 +447,34 @@ class PlanificateurCNC(models.Model):
                 generations=self.ga_generations,
                 crossover_rate=self.ga_crossover_rate,
                 mutation_rate=self.ga_mutation_rate,
-                objective=self._map_objective()
+                objective=self._map_objective(),
+                n_workers=self.ga_num_workers,
+                cache_size=self.ga_fitness_cache_size,
+                patience=self.ga_patience,
+                tol=self.ga_tol,
+                start_date=start_dt,
+                progress_callback=self._ga_progress_callback(),
+                seed=self.ga_seed,
             )
 
             solution, stats = ga.run()
 
-            self._apply_solution(solution, ga.of_data)
+            if self.env.context.get('ga_commit_progress'):
+                # Job : rien n'a encore été écrit ; terminer la transaction en
+                # lecture pour voir la progression committée à côté et éviter
+                # un conflit de mise à jour sur la ligne du scénario
+                self.env.cr.commit()
+                self.invalidate_recordset(['ga_progress', 'state', 'job_uuid'])
+                if self.state != 'optimizing':
+                    # Réinitialisé pendant l'AG : ne pas écraser le scénario
+                    return True
+
+            # Données temporelles du planning : un seul calcul, partagé par
+            # la timeline et le Gantt
+            gantt_data = create_gantt_chart_data(
+                solution, ga.of_data, self.machine_ids, self.temps_setup, start_dt)
+
+            self._apply_solution(solution, ga, gantt_data)
 
             self.write({
                 'makespan_final': stats['makespan'],
@@ -274,9 +482,10 @@ class PlanificateurCNC(models.Model):
                 'machine_balance': stats.get('machine_balance', 0),
                 'optimization_time': (datetime.now() - start).total_seconds(),
                 'state': 'optimized',
+                'ga_progress': 100,
             })
 
-            self._generate_visualizations(solution, ga.of_data, stats)
+            self._generate_visualizations(stats, gantt_data)
 
             return {
                 'type': 'ir.actions.act_window',
@@ -287,7 +496,7 @@ class PlanificateurCNC(models.Model):
             }
 
         except Exception as e:
-            _logger.error(f"Erreur AG: {e}", exc_info=True)
+            _logger.error("Erreur AG: %s", e, exc_info=True)
             raise UserError(f"Erreur d'optimisation: {str(e)}")
 
     def _optimize_heuristic(self):
@@ -298,107 +507,109 @@ class PlanificateurCNC(models.Model):
 
     def _map_objective(self):
         """Mapper objectif Odoo vers AG"""
-        mapping = {
-            'minimize_delays': 'delay',
-            'minimize_makespan': 'makespan',
-            'maximize_production': 'makespan',
-            'balance_load': 'balance',
-        }
-        return mapping.get(self.objectif_principal, 'makespan')
-
-    def _apply_solution(self, solution, of_data):
+        return GA_OBJECTIVES.get(self.objectif_principal, 'makespan')
+
+    def _delete_results(self):
+        """
+        Supprimer blocs et timeline des scénarios en deux DELETE SQL.
+        Chemin rapide : ces modèles n'ont ni unlink() surchargé ni
+        dépendance stockée ; la FK bloc_id des OF passe à NULL (ondelete).
+        """
+        if not self.ids:
+            return
+        self.env['bloc.production'].flush_model()
+        self.env['planning.timeline'].flush_model()
+        self.env['ordre.fabrication'].flush_model(['bloc_id'])
+        self.env.cr.execute(
+            "DELETE FROM planning_timeline WHERE planificateur_id IN %s", (tuple(self.ids),))
+        self.env.cr.execute(
+            "DELETE FROM bloc_production WHERE planificateur_id IN %s", (tuple(self.ids),))
+        self.env['planning.timeline'].invalidate_model()
+        self.env['bloc.production'].invalidate_model()
+        self.env['ordre.fabrication'].invalidate_model(['bloc_id'])
+        self.invalidate_recordset(['bloc_production_ids', 'timeline_ids'])
+        # Le DELETE SQL ne déclenche pas les recalculs : statistiques stockées
+        self.modified(['bloc_production_ids', 'timeline_ids'])
+
+    def _apply_solution(self, solution, ga, gantt_data):
         """Appliquer la solution AG"""
-        self.bloc_production_ids.unlink()
-        self.timeline_ids.unlink()
+        self._delete_results()
 
-        # Collecter tous les OF planifiés
-        scheduled_of_ids = set()
-
-        for idx, block_tasks in enumerate(solution.block_structure):
-            machine = self.machine_ids[solution.machine_assignments[idx]]
-
-            # Calculer durée et outils du bloc
-            total_time = 0
-            tools_set = set()
-
-            for task in block_tasks:
-                of_id, piece_idx, op_code = task  # Format pièce (3-tuple)
-                op_info = of_data[of_id]['ops'][op_code]
-                # Duration d'UNE pièce
-                piece_duration = op_info['duration'] / \
-                    of_data[of_id]['quantite']
-                total_time += piece_duration
-                tools_set.update(op_info['tool_ids'])
-                scheduled_of_ids.add(of_id)
+        # Durée et outils distincts de chaque bloc, calculés en une passe
+        block_times, block_tools = ga.block_totals(solution)
 
-            bloc = self.env['bloc.production'].create({
+        # Tous les blocs en un seul create groupé
+        bloc_vals = []
+        for idx in range(len(solution.block_structure)):
+            bloc_vals.append({
                 'planificateur_id': self.id,
                 'nom': f'Bloc {idx + 1}',
-                'machine_id': machine.id,
+                'machine_id': self.machine_ids[solution.machine_assignments[idx]].id,
                 'sequence': idx + 1,
-                'capacite_outils_utilisee': len(tools_set),
-                'duree_totale': total_time,
+                'capacite_outils_utilisee': block_tools[idx],
+                'duree_totale': float(block_times[idx]),
             })
+        blocs = self.env['bloc.production'].create(bloc_vals)
 
-            # Lier les OF au bloc (partiel car OF peut être dans plusieurs blocs)
-            # On met à jour le statut
-            for task in block_tasks:
-                of_id, _, _ = task
-                of = self.env['ordre.fabrication'].browse(of_id)
-                of.write({'state': 'scheduled'})
+        # Un OF peut être réparti sur plusieurs blocs (niveau pièce) :
+        # il est rattaché au premier bloc où il apparaît
+        of_ids_by_bloc = defaultdict(list)
+        scheduled_of_ids = set()
+        for bloc, block_tasks in zip(blocs, solution.block_structure):
+            for of_id, _, _ in block_tasks:
+                if of_id not in scheduled_of_ids:
+                    scheduled_of_ids.add(of_id)
+                    of_ids_by_bloc[bloc].append(of_id)
+
+        # Une écriture groupée par bloc, sans suivi mail
+        OrdreFabrication = self.env['ordre.fabrication'].with_context(
+            tracking_disable=True, mail_notrack=True)
+        for bloc, of_ids in of_ids_by_bloc.items():
+            OrdreFabrication.browse(of_ids).write({
+                'bloc_id': bloc.id,
+                'machine_assignee_id': bloc.machine_id.id,
+                'state': 'scheduled',
+            })
 
         # Mettre à jour la liste des OF sélectionnés
         self.of_selectionne_ids = [(6, 0, list(scheduled_of_ids))]
 
-        # Générer les données temporelles précises
-        gantt_data = create_gantt_chart_data(
-            solution, of_data, self.machine_ids,
-            self.temps_setup, datetime.combine(
-                self.date_debut, datetime.min.time()) if self.date_debut else datetime.now()
-        )
+        # Machine par nom : une lookup dict au lieu d'un filtered par élément
+        machine_by_nom = {m.nom: m.id for m in self.machine_ids}
 
+        timeline_vals = []
         for item in gantt_data:
             if item['type'] == 'production':
-                # Extraire l'op_code depuis la task (format: "OF-00001-P1 OP1")
-                task_name = item['task']
-                op_code = task_name.split()[-1]  # Dernière partie = OP1 ou OP2
-
-                self.env['planning.timeline'].create({
+                timeline_vals.append({
                     'planificateur_id': self.id,
                     'of_id': item['of_id'],
-                    'machine_id': self.machine_ids.filtered(lambda m: m.nom == item['machine']).id,
+                    'machine_id': machine_by_nom.get(item['machine'], False),
                     'date_debut': item['start'],
                     'date_fin': item['end'],
-                    'duree': (item['end'] - item['start']).total_seconds() / 60,
                     'type_activite': 'production',
-                    'operation_id': of_data[item['of_id']]['ops'].get(op_code, {}).get('id', False)
+                    'operation_id': item['operation_id'] or False,
                 })
             elif item['type'] == 'setup':
-                self.env['planning.timeline'].create({
+                timeline_vals.append({
                     'planificateur_id': self.id,
-                    'machine_id': self.machine_ids.filtered(lambda m: m.nom == item['machine']).id,
+                    'machine_id': machine_by_nom.get(item['machine'], False),
                     'date_debut': item['start'],
                     'date_fin': item['end'],
-                    'duree': (item['end'] - item['start']).total_seconds() / 60,
                     'type_activite': 'setup'
                 })
+        self.env['planning.timeline'].create(timeline_vals)
 
-    def _generate_visualizations(self, solution, of_data, stats):
+    def _generate_visualizations(self, stats, gantt_data):
         """Générer Gantt et graphiques"""
         try:
-            gantt_data = create_gantt_chart_data(
-                solution, of_data, self.machine_ids,
-                self.temps_setup, datetime.combine(
-                    self.date_debut, datetime.min.time()) if self.date_debut else datetime.now()
-            )
-
             gen = GanttChartGenerator(gantt_data, f"Planning - {self.nom}")
             fig = gen.generate_advanced_gantt()
-            html_content = fig.to_html(include_plotlyjs='cdn')
+            self.gantt_json = fig.to_json()
+            html_content = _html_from_json(self.gantt_json)
 
             # Créer attachment pour Gantt
             gantt_attachment = self._create_html_attachment(
-                f'gantt_{self.id}.html',
+                f'gantt_{self.id}.html.gz',
                 html_content
             )
             self.gantt_attachment_id = gantt_attachment.id
@@ -408,9 +619,9 @@ class PlanificateurCNC(models.Model):
                 fig_conv = GanttChartGenerator.create_convergence_chart(
                     stats['best_fitness_history'], stats['avg_fitness_history']
                 )
-                conv_html = fig_conv.to_html(include_plotlyjs='cdn')
+                conv_html = fig_conv.to_html(include_plotlyjs=PLOTLYJS_URL).encode('utf-8')
                 conv_attachment = self._create_html_attachment(
-                    f'convergence_{self.id}.html',
+                    f'convergence_{self.id}.html.gz',
                     conv_html
                 )
                 self.convergence_attachment_id = conv_attachment.id
@@ -419,17 +630,22 @@ class PlanificateurCNC(models.Model):
             self.statistics_report = self._format_stats(report)
 
         except Exception as e:
-            _logger.error(f"Erreur visualisation: {e}")
+            _logger.error("Erreur visualisation: %s", e)
 
     def _create_html_attachment(self, filename, html_content):
-        """Créer un attachment HTML"""
+        """Créer un attachment HTML compressé gzip (html_content : octets UTF-8)
+
+        Le HTML Plotly (JSON de la figure) se compresse très bien ; il est
+        servi tel quel avec Content-Encoding: gzip par /planificateur_cnc/chart.
+        """
         attachment_vals = {
             'name': filename,
             'type': 'binary',
-            'datas': base64.b64encode(html_content.encode('utf-8')),
+            # raw : contenu binaire stocké tel quel, sans copie base64
+            'raw': gzip.compress(html_content, compresslevel=6),
             'res_model': self._name,
             'res_id': self.id,
-            'mimetype': 'text/html',
+            'mimetype': 'application/gzip',
             'public': True,
         }
         return self.env['ir.attachment'].create(attachment_vals)
@@ -452,28 +668,29 @@ class PlanificateurCNC(models.Model):
         return text
 
     def action_export_excel(self):
-        """Exporter les résultats en Excel avec OpenPyXL"""
+        """Exporter les résultats en Excel avec XlsxWriter"""
         self.ensure_one()
 
-        if not openpyxl:
+        if not xlsxwriter:
             raise UserError(
-                "La librairie 'openpyxl' n'est pas installée. (pip install openpyxl)")
+                "La librairie 'xlsxwriter' n'est pas installée. (pip install xlsxwriter)")
 
-        # Création du classeur
-        wb = openpyxl.Workbook()
+        # Création du classeur : constant_memory écrit les lignes au fil de
+        # l'eau (ordre croissant des lignes obligatoire) au lieu de garder
+        # une cellule Python par valeur
+        fp = BytesIO()
+        wb = xlsxwriter.Workbook(fp, {'constant_memory': True})
 
-        # --- CONFIGURATION DES STYLES ---
-        header_font = Font(bold=True, color="FFFFFF")
-        header_fill = PatternFill(
-            start_color="4F81BD", end_color="4F81BD", fill_type="solid")
-        center_align = Alignment(horizontal='center', vertical='center')
-        border_style = Side(style='thin')
-        thin_border = Border(left=border_style, right=border_style,
-                             top=border_style, bottom=border_style)
+        # --- CONFIGURATION DES STYLES (créés une seule fois) ---
+        bold_fmt = wb.add_format({'bold': True})
+        header_fmt = wb.add_format({
+            'bold': True, 'font_color': 'white', 'bg_color': '#4F81BD',
+            'align': 'center', 'valign': 'vcenter', 'border': 1})
+        cell_fmt = wb.add_format({'border': 1})
+        date_fmt = wb.add_format({'border': 1, 'align': 'center', 'valign': 'vcenter'})
 
         # --- FEUILLE 1 : RÉSUMÉ ---
-        ws_summary = wb.active
-        ws_summary.title = "Résumé"
+        ws_summary = wb.add_worksheet("Résumé")
 
         summary_data = [
             ["Scénario", self.nom],
@@ -488,18 +705,17 @@ class PlanificateurCNC(models.Model):
             ["Nombre OF", self.nb_of_optimises],
         ]
 
-        for row_idx, row_data in enumerate(summary_data, 1):
-            for col_idx, value in enumerate(row_data, 1):
-                cell = ws_summary.cell(row=row_idx, column=col_idx, value=str(
-                    value) if value is not None else "")
-                if row_idx == 6 or col_idx == 1:
-                    cell.font = Font(bold=True)
+        for row_idx, row_data in enumerate(summary_data):
+            for col_idx, value in enumerate(row_data):
+                ws_summary.write_string(
+                    row_idx, col_idx, str(value) if value is not None else "",
+                    bold_fmt if row_idx == 5 or col_idx == 0 else None)
 
-        ws_summary.column_dimensions['A'].width = 25
-        ws_summary.column_dimensions['B'].width = 40
+        ws_summary.set_column('A:A', 25)
+        ws_summary.set_column('B:B', 40)
 
         # --- FEUILLE 2 : DÉTAIL PLANNING ---
-        ws_plan = wb.create_sheet("Planning Détaillé")
+        ws_plan = wb.add_worksheet("Planning Détaillé")
 
         headers = [
             'Machine', 'Bloc', 'Séquence', 'Numéro OF',
@@ -507,95 +723,85 @@ class PlanificateurCNC(models.Model):
             'Outils Requis', 'Priorité', 'Durée (min)', 'État'
         ]
 
-        # Écriture des en-têtes
-        for col_idx, header in enumerate(headers, 1):
-            cell = ws_plan.cell(row=1, column=col_idx, value=header)
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = center_align
-            cell.border = thin_border
+        # Écriture des en-têtes ; largeur de colonne suivie pendant l'écriture
+        ws_plan.write_row(0, 0, headers, header_fmt)
+        max_len = [len(h) for h in headers]
 
         # --- MAPPING AVANCÉ DES DATES ---
-        timeline_map = {}
-
-        for t in self.timeline_ids:
-            if t.of_id:
-                key = t.of_id.id
-                if t.bloc_id:
-                    key = (t.bloc_id.id, t.of_id.id)
-
-                timeline_map[key] = {
-                    'start': t.date_debut,
-                    'end': t.date_fin
-                }
+        # (début, fin) de chaque OF : première et dernière ligne de production.
+        # read(load=False) : dictionnaires simples, ids entiers pour les many2one
+        timeline_by_of = {}
+        for t in self.timeline_ids.read(['of_id', 'date_debut', 'date_fin'], load=False):
+            of_id = t['of_id']
+            if not of_id:
+                continue
+            dates = timeline_by_of.get(of_id)
+            if dates:
+                timeline_by_of[of_id] = (min(dates[0], t['date_debut']),
+                                         max(dates[1], t['date_fin']))
+            else:
+                timeline_by_of[of_id] = (t['date_debut'], t['date_fin'])
 
         # Remplissage des données
-        row = 2
+        row = 1
         sorted_blocs = self.bloc_production_ids.sorted(
             key=lambda b: (b.machine_id.nom, b.sequence))
 
+        # Champs lus ligne par ligne : chargés en quelques requêtes groupées
+        all_ofs = sorted_blocs.mapped('of_ids')
+        all_ofs.read(['numero_of', 'type_piece_id', 'quantite', 'nombre_outils_requis',
+                      'priorite', 'temps_total_estime', 'state'])
+        all_ofs.mapped('type_piece_id.nom')
+        state_labels = dict(self.env['ordre.fabrication']._fields['state'].selection)
+
         for bloc in sorted_blocs:
             for of in bloc.of_ids:
-                dates = timeline_map.get((bloc.id, of.id))
-                if not dates:
-                    dates = timeline_map.get(of.id)
-
-                start_str = ""
-                end_str = ""
-                if dates:
-                    if dates.get('start'):
-                        start_str = dates['start'].strftime('%d/%m/%Y %H:%M')
-                    if dates.get('end'):
-                        end_str = dates['end'].strftime('%d/%m/%Y %H:%M')
-
-                ws_plan.cell(row=row, column=1, value=bloc.machine_id.nom)
-                ws_plan.cell(row=row, column=2, value=bloc.nom)
-                ws_plan.cell(row=row, column=3, value=bloc.sequence)
-                ws_plan.cell(row=row, column=4, value=of.numero_of)
-                ws_plan.cell(
-                    row=row, column=5, value=of.type_piece_id.nom if of.type_piece_id else "")
-                ws_plan.cell(row=row, column=6, value=of.quantite)
-
-                ws_plan.cell(row=row, column=7,
-                             value=start_str).alignment = center_align
-                ws_plan.cell(row=row, column=8,
-                             value=end_str).alignment = center_align
-
-                ws_plan.cell(row=row, column=9, value=of.nombre_outils_requis)
-                ws_plan.cell(row=row, column=10, value=of.priorite)
-                ws_plan.cell(row=row, column=11, value=of.temps_total_estime)
-
-                state_val = dict(of._fields['state'].selection).get(
-                    of.state) if of.state else ""
-                ws_plan.cell(row=row, column=12, value=state_val)
-
-                for col in range(1, 13):
-                    ws_plan.cell(row=row, column=col).border = thin_border
+                start, end = timeline_by_of.get(of.id, (False, False))
+                start_str = start.strftime('%d/%m/%Y %H:%M') if start else ""
+                end_str = end.strftime('%d/%m/%Y %H:%M') if end else ""
+
+                state_val = state_labels.get(of.state, "") if of.state else ""
+
+                values = [
+                    bloc.machine_id.nom, bloc.nom, bloc.sequence, of.numero_of,
+                    of.type_piece_id.nom if of.type_piece_id else "", of.quantite,
+                    start_str, end_str,
+                    of.nombre_outils_requis, of.priorite, of.temps_total_estime, state_val,
+                ]
+                ws_plan.write_row(row, 0, values[:6], cell_fmt)
+                ws_plan.write_row(row, 6, values[6:8], date_fmt)
+                ws_plan.write_row(row, 8, values[8:], cell_fmt)
+                for col, value in enumerate(values):
+                    max_len[col] = max(max_len[col], len(str(value)))
 
                 row += 1
 
-        for column_cells in ws_plan.columns:
-            length = max(len(str(cell.value) or "") for cell in column_cells)
-            ws_plan.column_dimensions[get_column_letter(
-                column_cells[0].column)].width = min(length + 3, 50)
+        for col, length in enumerate(max_len):
+            ws_plan.set_column(col, col, min(length + 3, 50))
 
         # --- SAUVEGARDE ---
-        fp = BytesIO()
-        wb.save(fp)
-        fp.seek(0)
-        data = fp.read()
+        wb.close()
+        data = fp.getvalue()
         fp.close()
 
         filename = f"Planning_{self.nom.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx"
 
-        self.write({
-            'excel_file': base64.b64encode(data),
-            'excel_filename': filename
+        # Octets bruts (raw) : ni base64 ni copie dans la ligne du scénario
+        old_attachment = self.excel_attachment_id
+        attachment = self.env['ir.attachment'].create({
+            'name': filename,
+            'type': 'binary',
+            'raw': data,
+            'res_model': self._name,
+            'res_id': self.id,
+            'mimetype': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
         })
+        self.excel_attachment_id = attachment.id
+        old_attachment.unlink()
 
         return {
             'type': 'ir.actions.act_url',
-            'url': f'/web/content/?model={self._name}&id={self.id}&field=excel_file&download=true&filename={filename}',
+            'url': f'/web/content/{attachment.id}?download=true',
             'target': 'self',
         }
 
@@ -605,6 +811,7 @@ class PlanificateurCNC(models.Model):
 
     def action_reset_draft(self):
         """Remettre en brouillon"""
+        self._cancel_ga_job()
         self.write({
             'state': 'draft',
             'makespan_final': 0,
@@ -614,10 +821,12 @@ class PlanificateurCNC(models.Model):
             'gantt_attachment_id': False,
             'convergence_attachment_id': False,
             'statistics_report': False,
-            'excel_file': False,
-            'excel_filename': False,
+            'excel_attachment_id': False,
+            'gantt_json': False,
+            'ga_progress': 0,
+            'job_uuid': False,
+            'etat_avant_optimisation': False,
         })
 
-        self.bloc_production_ids.unlink()
-        self.timeline_ids.unlink()
+        self._delete_results()
         self.of_selectionne_ids = [(5, 0, 0)]
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime, timedelta
+
+from odoo import fields
+from odoo.tests.common import TransactionCase
+
+
+class TestOrdreFabrication(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.type_piece = cls.env['piece.type'].create({
+            'nom': 'Piece Test',
+            'code': 'PT',
+            'palette_type': 'S',
+        })
+
+    def _create_of(self, numero, **vals):
+        return self.env['ordre.fabrication'].create(dict({
+            'numero_of': numero,
+            'type_piece_id': self.type_piece.id,
+            'date_livraison': datetime.now() + timedelta(days=5),
+        }, **vals))
+
+    def test_create_reads_database_defaults(self):
+        # Valeurs posées par Postgres (DEFAULT / trigger) visibles dès le create
+        of = self.env['ordre.fabrication'].create({
+            'numero_of': 'OF-TEST-1',
+            'type_piece_id': self.type_piece.id,
+            'date_livraison': datetime.now() + timedelta(days=5),
+        })
+
+        self.assertTrue(of.date_creation)
+        # CURRENT_DATE suit le fuseau de la session Postgres : tolérance d'un jour
+        self.assertLessEqual(abs((of.date_creation - fields.Date.today()).days), 1)
+        self.assertTrue(of.nom)
+
+    def test_create_bulk(self):
+        ofs = self.env['ordre.fabrication'].create_bulk([{
+            'numero_of': 'OF-BULK-%d' % i,
+            'type_piece_id': self.type_piece.id,
+            'date_livraison': datetime.now() + timedelta(days=5),
+        } for i in range(1, 3)])
+
+        self.assertEqual(len(ofs), 2)
+        self.assertEqual(ofs.mapped('nom'), ['OF-BULK-1 - Piece Test', 'OF-BULK-2 - Piece Test'])
+        self.assertTrue(all(ofs.mapped('date_creation')))
+
+    def test_generate_pieces_twice(self):
+        of = self.env['ordre.fabrication'].create({
+            'numero_of': 'OF-PIECES',
+            'type_piece_id': self.type_piece.id,
+            'date_livraison': datetime.now() + timedelta(days=5),
+            'quantite': 3,
+        })
+        of._generate_pieces()
+        self.assertFalse(of._generate_pieces())
+        self.assertEqual(sorted(of.piece_ids.mapped('numero_serie')), ['00001', '00002', '00003'])
+
+        # Quantité augmentée : seule la pièce manquante est créée
+        of.quantite = 4
+        self.assertEqual(of._generate_pieces().mapped('numero_serie'), ['00004'])
+        self.assertEqual(len(of.piece_ids), 4)
+
+    def test_dashboard_counts(self):
+        m1, m2 = self.env['machine.cnc'].create([
+            {'nom': 'Machine Test 1', 'code': 'MT1'},
+            {'nom': 'Machine Test 2', 'code': 'MT2'},
+        ])
+        for numero, machine, state in [
+            ('OF-DASH-1', m1, 'confirmed'),
+            ('OF-DASH-2', m1, 'confirmed'),
+            ('OF-DASH-3', m1, 'scheduled'),
+            ('OF-DASH-4', m2, 'scheduled'),
+            ('OF-DASH-5', m2, 'draft'),
+        ]:
+            self._create_of(numero, machine_assignee_id=machine.id, state=state)
+
+        counts = {
+            (g['machine_assignee_id'][0], g['state']): g['__count']
+            for g in self.env['ordre.fabrication'].dashboard_counts()
+            if g['machine_assignee_id'] and g['machine_assignee_id'][0] in (m1 | m2).ids
+        }
+        # Les OF en brouillon ne sont pas comptés
+        self.assertEqual(counts, {
+            (m1.id, 'confirmed'): 2,
+            (m1.id, 'scheduled'): 1,
+            (m2.id, 'scheduled'): 1,
+        })
+
+    def test_stats_par_etat(self):
+        ofs = self.env['ordre.fabrication']
+        for numero, state, terminees in [
+            ('OF-STAT-1', 'confirmed', 2),
+            ('OF-STAT-2', 'confirmed', 3),
+            ('OF-STAT-3', 'in_progress', 4),
+        ]:
+            ofs |= self._create_of(numero, state=state, quantite=5, nb_pieces_terminees=terminees)
+
+        stats = {
+            g['state']: g
+            for g in self.env['ordre.fabrication'].stats_par_etat([('id', 'in', ofs.ids)])
+        }
+        self.assertEqual(set(stats), {'confirmed', 'in_progress'})
+        self.assertEqual(stats['confirmed']['nb_pieces_terminees'], 5)
+        self.assertEqual(stats['confirmed']['quantite'], 10)
+        self.assertEqual(stats['in_progress']['nb_pieces_terminees'], 4)
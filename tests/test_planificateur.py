@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+from odoo.tests.common import TransactionCase
+
+
+class TestPlanificateurReset(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        type_piece = cls.env['piece.type'].create({
+            'nom': 'Piece Test',
+            'code': 'PT',
+            'palette_type': 'S',
+        })
+        cls.machine = cls.env['machine.cnc'].create({'nom': 'Machine Test', 'code': 'MT'})
+        cls.of = cls.env['ordre.fabrication'].create({
+            'numero_of': 'OF-RESET',
+            'type_piece_id': type_piece.id,
+            'date_livraison': datetime.now() + timedelta(days=5),
+        })
+        cls.planner = cls.env['planificateur.cnc'].create({
+            'nom': 'Scénario Test',
+            'date_debut': date.today(),
+            'date_fin': date.today() + timedelta(days=7),
+            'machine_ids': [(6, 0, cls.machine.ids)],
+            'of_candidat_ids': [(6, 0, cls.of.ids)],
+        })
+
+    def test_reset_clears_results(self):
+        # Solution AG minimale : un bloc de 120 min contenant l'OF
+        solution = SimpleNamespace(
+            block_structure=[[(self.of.id, None, None)]], machine_assignments=[0])
+        ga = SimpleNamespace(block_totals=lambda solution: ([120.0], [3]))
+        self.planner._apply_solution(solution, ga, [])
+        self.planner.write({'state': 'optimized', 'makespan_final': 200})
+
+        self.assertEqual(self.planner.nb_blocs, 1)
+        self.assertAlmostEqual(self.planner.taux_utilisation, 60.0)
+        self.assertTrue(self.of.bloc_id)
+
+        self.planner.action_reset()
+
+        # Cache
+        self.assertEqual(self.planner.nb_blocs, 0)
+        self.assertEqual(self.planner.taux_utilisation, 0)
+        self.assertFalse(self.of.bloc_id)
+
+        # Base de données
+        self.env.flush_all()
+        self.env.cr.execute(
+            "SELECT nb_blocs, taux_utilisation FROM planificateur_cnc WHERE id = %s",
+            (self.planner.id,))
+        self.assertEqual(self.env.cr.fetchone(), (0, 0))
+        self.env.cr.execute(
+            "SELECT bloc_id FROM ordre_fabrication WHERE id = %s", (self.of.id,))
+        self.assertEqual(self.env.cr.fetchone(), (None,))
@@ -2,6 +2,7 @@ import unittest
 from unittest.mock import MagicMock
 import sys
 import os
+import random
 from datetime import datetime, timedelta
 
 # Add the models directory to path so we can import the scheduler
@@ -48,6 +49,7 @@ class TestGAScheduler(unittest.TestCase):
         self.op1.outil_ids = MagicMock()
         self.op1.outil_ids.mapped.return_value = [1, 1] # 2 tools
         self.op1.outil_ids.ids = [10, 11]
+        self.op1.outil_ids_sorted = '10,11'
         
         self.op2 = MagicMock()
         self.op2.id = 2
@@ -55,6 +57,7 @@ class TestGAScheduler(unittest.TestCase):
         self.op2.outil_ids = MagicMock()
         self.op2.outil_ids.mapped.return_value = [1] # 1 tool
         self.op2.outil_ids.ids = [12]
+        self.op2.outil_ids_sorted = '12'
         
         self.type_piece = MagicMock()
         self.type_piece.nom = "Piece X"
@@ -124,5 +127,42 @@ class TestGAScheduler(unittest.TestCase):
         print(f"Makespan Good: {ind.makespan}")
         self.assertGreater(ind.makespan, 190)
 
+    def test_fitness_delay(self):
+        start = datetime(2025, 11, 3, 8, 0)
+        self.of1.date_livraison = start + timedelta(minutes=50)
+        ga = GeneticAlgorithmScheduler(self.ofs, self.machines,
+                                       objective='delay', start_date=start)
+
+        # Piece 0 only: setup 30, OP1 35->45, OP2 max(45, 45+2)+5 = 52 -> 57
+        blocks = [[(101, 0, 'OP1'), (101, 0, 'OP2')]]
+        ind = Individual([t for b in blocks for t in b], [0], blocks)
+        ga._evaluate_fitness(ind)
+
+        self.assertAlmostEqual(ind.makespan, 57)
+        self.assertAlmostEqual(ind.total_delay, 7)  # due at 50
+        self.assertAlmostEqual(ind.fitness, 7)
+
+    def test_block_totals(self):
+        ga = GeneticAlgorithmScheduler(self.ofs, self.machines)
+        blocks = [[(101, 0, 'OP1'), (101, 1, 'OP1')], [(101, 0, 'OP2')]]
+        ind = Individual([t for b in blocks for t in b], [0, 0], blocks)
+
+        times, tools = ga.block_totals(ind)
+
+        self.assertEqual(list(times), [20.0, 5.0])  # 2 x 10 min, 1 x 5 min
+        self.assertEqual(tools, [2, 1])
+
+    def test_seeded_run_keeps_global_random(self):
+        state = random.getstate()
+        ga = GeneticAlgorithmScheduler(self.ofs, self.machines, population_size=4,
+                                       generations=2, seed=42)
+        best, _ = ga.run()
+
+        # La graine ne s'applique qu'au générateur de l'instance
+        self.assertEqual(random.getstate(), state)
+        again, _ = GeneticAlgorithmScheduler(self.ofs, self.machines, population_size=4,
+                                             generations=2, seed=42).run()
+        self.assertEqual(best.sequence, again.sequence)
+
 if __name__ == '__main__':
     unittest.main()